@@ -1,10 +1,15 @@
 # analyze_measurements.py
+import os
+import warnings
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from sinus_tools import fit_sinusoidal_model
+from sinus_tools import fit_sinusoidal_model, fit_sinusoids
+from trip_store import load_trips, save_trips
 
 CSV_FILE = "planet_measurements.csv"
+# typed copy of CSV_FILE (see trip_store), built on first load
+DATASET_DIR = "planet_measurements"
 
 COLUMN_NAMES = [
     "planet",
@@ -28,7 +33,7 @@ def load_csv():
     else:
         df = pd.read_csv(CSV_FILE)
 
-    if df["survived"].dtype == object:
+    if not pd.api.types.is_numeric_dtype(df["survived"]):
         df["survived"] = df["survived"].astype(str).map(
             {"True": 1, "False": 0, "1": 1, "0": 0}
         ).astype(int)
@@ -36,26 +41,88 @@ def load_csv():
     return df
 
 
-def analyze_planet(df, planet):
-    dfp = df[df.planet == planet]
-
-    runs = sorted(dfp.run.unique())
+def load_measurements(columns=None, filters=None):
+    """
+    Load the measurements from the typed dataset, building it from
+    CSV_FILE the first time (or when the CSV is newer).
+    """
+    csv_mtime = os.path.getmtime(CSV_FILE) if os.path.isfile(CSV_FILE) else 0
+    if not os.path.isdir(DATASET_DIR) or os.path.getmtime(DATASET_DIR) < csv_mtime:
+        print(f">>> Building typed dataset {DATASET_DIR}/ from {CSV_FILE}")
+        save_trips(load_csv(), DATASET_DIR, mode="overwrite")
+
+    return load_trips(DATASET_DIR, columns=columns, filters=filters)
+
+
+def pivot_runs(df, value="survived"):
+    """
+    Scatter the measurements into one dense planets x runs x trips array.
+
+    Runs may have different lengths (a run interrupted by an API error);
+    trips that were not measured are NaN. A (planet, run, trip_index)
+    measured more than once (e.g. a run id reused when a campaign was
+    restarted) keeps its last row, with a warning.
+
+    Returns:
+        Tuple (cube, planets, runs, trips): cube has shape
+        (len(planets), len(runs), len(trips)); trips are trip_index values
+    """
+    duplicated = df.duplicated(["planet", "run", "trip_index"], keep="last")
+    if duplicated.any():
+        warnings.warn(f"{int(duplicated.sum())} duplicate (planet, run, trip_index) rows; "
+                      "keeping the last measurement of each")
+        df = df[~duplicated]
+
+    planets, planet_idx = np.unique(df["planet"].to_numpy(), return_inverse=True)
+    runs, run_idx = np.unique(df["run"].to_numpy(), return_inverse=True)
+    trip_index = df["trip_index"].to_numpy()
+    first = trip_index.min() if len(trip_index) else 0
+    trips = np.arange(first, trip_index.max() + 1 if len(trip_index) else first)
+
+    cube = np.full((len(planets), len(runs), len(trips)), np.nan)
+    cube[planet_idx, run_idx, trip_index - first] = df[value].to_numpy(dtype=float)
+    return cube, planets, runs, trips
+
+
+def run_statistics(cube):
+    """
+    Cross-run curves of every planet, ignoring missing trips.
+
+    Args:
+        cube: Array of shape (planets, runs, trips) from pivot_runs
+
+    Returns:
+        Dict of arrays of shape (planets, trips): count, mean and std
+        (NaN where no run has the trip)
+    """
+    stats = {"count": np.sum(~np.isnan(cube), axis=1)}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)   # all-NaN trips
+        stats["mean"] = np.nanmean(cube, axis=1)
+        stats["std"] = np.nanstd(cube, axis=1)
+    return stats
+
+
+def analyze_planet(planet, runs, trips, runs_data, mean_curve, std_curve):
+    """
+    Plot and fit one planet.
+
+    Args:
+        planet: Planet index
+        runs: Run ids (rows of runs_data)
+        trips: Trip indices (columns of runs_data)
+        runs_data: Survivals of each run, NaN where not measured
+        mean_curve, std_curve: Cross-run mean and std per trip
+    """
+    measured = ~np.all(np.isnan(runs_data), axis=1)
+    runs, runs_data = runs[measured], runs_data[measured]
 
     if len(runs) == 0:
         print(f"No data for planet {planet}")
         return
 
-    all_runs = []
-    for r in runs:
-        s = dfp[dfp.run == r].sort_values("trip_index").survived.to_numpy()
-        all_runs.append(s)
-
-    all_runs = np.array(all_runs)
-    mean_curve = all_runs.mean(axis=0)
-    std_curve = all_runs.std(axis=0)
-
     # Fit sinusoïde sur la moyenne
-    t = np.arange(len(mean_curve))
+    t = trips
     fit = fit_sinusoidal_model(t, mean_curve)
 
 
@@ -76,17 +143,33 @@ def analyze_planet(df, planet):
         print(f"  amplitude = {fit.amplitude:.4f}")
         print(f"  phase = {fit.phase:.4f}")
         print(f"  c0 = {fit.c0:.4f}")
+
+        # every run on its own (phases differ between episodes), in one batch
+        runs_fit = fit_sinusoids(t, runs_data)
+        for r, period, amplitude, amplitude_err, phase, phase_err in zip(
+            runs, runs_fit.period, runs_fit.amplitude, runs_fit.amplitude_err,
+            runs_fit.phase, runs_fit.phase_err
+        ):
+            print(f"  run {r}: period = {period:.1f}, amplitude = {amplitude:.4f} ± {amplitude_err:.4f}, "
+                  f"phase = {phase:.4f} ± {phase_err:.4f}")
     else:
         print(f"Planet {planet}: sinusoidal fit failed.")
 
 
 def main():
     print("=== ANALYZING planet_measurements.csv ===")
-    df = load_csv()
+    df = load_measurements(columns=["planet", "run", "trip_index", "survived"])
+
+    cube, planets, runs, trips = pivot_runs(df)
+    stats = run_statistics(cube)
 
     for planet in [0, 1, 2]:
         print(f"\n====== PLANET {planet} ======")
-        analyze_planet(df, planet)
+        if planet not in planets:
+            print(f"No data for planet {planet}")
+            continue
+        i = int(np.searchsorted(planets, planet))
+        analyze_planet(planet, runs, trips, cube[i], stats["mean"][i], stats["std"][i])
 
 
 if __name__ == "__main__":
@@ -4,26 +4,210 @@ Base URL: https://challenge.sphinxhq.com
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
 import os
-from typing import Dict, Optional
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple, Union
 from dotenv import load_dotenv
 
 
+class TokenBucket:
+    """Thread-safe token-bucket rate limiter."""
+    
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        Initialize the rate limiter.
+        
+        Args:
+            rate: Sustained number of requests per second
+            burst: Maximum number of requests sent back-to-back (default: 1 second of rate)
+        """
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.last = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """
+        Block until a request may be sent.
+        
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                
+                delay = self.paused_until - now
+                if delay <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    delay = (1 - self.tokens) / self.rate
+            
+            time.sleep(delay)
+            waited += delay
+    
+    def pause(self, seconds: float):
+        """Hold every request for the given number of seconds (e.g. after a 429)."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+class RetryPolicy:
+    """
+    Retry rules of SphinxAPIClient.
+    
+    Idempotent requests (status, start) are retried on connection errors,
+    timeouts and any retryable status. Non-idempotent requests (portal) are
+    only retried when the server certainly did not process them: connection
+    never established, 429 or 503.
+    """
+    
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    NOT_PROCESSED_STATUSES = (429, 503)
+    
+    def __init__(self, max_retries: int = 5, backoff_base: float = 0.5, backoff_max: float = 30.0):
+        """
+        Args:
+            max_retries: Maximum number of retries per request
+            backoff_base: Backoff of the first retry, in seconds
+            backoff_max: Maximum backoff, in seconds
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+    
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for the given retry attempt."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+    
+    def should_retry_status(self, status_code: int, idempotent: bool) -> bool:
+        if idempotent:
+            return status_code in self.RETRY_STATUSES
+        return status_code in self.NOT_PROCESSED_STATUSES
+    
+    def should_retry_error(self, error: Exception, idempotent: bool) -> bool:
+        if idempotent:
+            return isinstance(error, (requests.ConnectionError, requests.Timeout))
+        return _never_sent(error)
+
+
+def _never_sent(error: Exception) -> bool:
+    """True if the request failed before a connection to the server existed."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError) and error.args:
+        reason = getattr(error.args[0], "reason", None)
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+    return False
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class EpisodeState:
+    """
+    Client-side copy of the episode counters.
+    
+    Kept current from every start/portal/status response, so the status can
+    be served locally. It is only valid once all counters have been seen.
+    The status_message is not kept: portal responses do not carry it, so a
+    local copy would go stale (get_status(refresh=True) fetches it).
+    """
+    
+    FIELDS = ("morties_in_citadel", "morties_on_planet_jessica", "morties_lost", "steps_taken")
+    
+    def __init__(self):
+        self.morties_in_citadel = None
+        self.morties_on_planet_jessica = None
+        self.morties_lost = None
+        self.steps_taken = None
+        self.valid = False
+    
+    def update(self, response: Dict):
+        """Copy the counters found in an API response."""
+        for field in self.FIELDS:
+            if field in response:
+                setattr(self, field, response[field])
+        self.valid = all(getattr(self, field) is not None for field in self.FIELDS)
+    
+    def invalidate(self):
+        """Force the next status read to go to the server."""
+        self.valid = False
+    
+    def as_status(self) -> Dict:
+        """Status dict with the counters of the /status/ endpoint (no status_message)."""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
 class SphinxAPIClient:
     """Client for interacting with the Sphinx Morty Express Challenge API."""
     
     BASE_URL = "https://challenge.sphinxhq.com"
     
-    def __init__(self, api_token: Optional[str] = None):
+    def __init__(
+        self,
+        api_token: Optional[str] = None,
+        base_url: Optional[str] = None,
+        pool_size: int = 4,
+        timeout: Union[float, Tuple[float, float]] = (5.0, 30.0),
+        retry: Optional[RetryPolicy] = None,
+        rate_limit: Optional[float] = None,
+        burst: Optional[int] = None
+    ):
         """
         Initialize the API client.
         
+        The client owns a pooled requests.Session, so every call reuses a
+        keep-alive connection instead of a new TCP+TLS handshake. Call close()
+        when done, or use the client as a context manager.
+        
+        Transient failures are retried with exponential backoff and jitter
+        (see RetryPolicy), Retry-After is honoured, and an optional token
+        bucket caps the request rate for long campaigns.
+        
         Args:
             api_token: API token for authentication. If not provided, 
                       will try to load from SPHINX_API_TOKEN environment variable.
+            base_url: Server URL. If not provided, uses the SPHINX_BASE_URL
+                      environment variable, then BASE_URL (e.g. point it at
+                      local_server.py for offline runs).
+            pool_size: Maximum number of kept-alive connections
+            timeout: Request timeout in seconds, or (connect, read) tuple
+            retry: Retry policy (default: RetryPolicy())
+            rate_limit: Maximum sustained requests per second (None = unlimited)
+            burst: Token-bucket capacity when rate_limit is set
         """
         load_dotenv()
         self.api_token = api_token or os.getenv("SPHINX_API_TOKEN")
+        self.base_url = (base_url or os.getenv("SPHINX_BASE_URL") or self.BASE_URL).rstrip("/")
         
         if not self.api_token:
             raise ValueError(
@@ -35,6 +219,70 @@ class SphinxAPIClient:
             "Authorization": f"Bearer {self.api_token}",
             "Content-Type": "application/json"
         }
+        
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        self.retry = retry or RetryPolicy()
+        self.rate_limiter = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.retries = 0
+        self.state = EpisodeState()
+    
+    def _request(self, method: str, url: str, idempotent: bool, **kwargs) -> Dict:
+        """
+        Send a request through the retry/rate-limit scheduler.
+        
+        Args:
+            method: HTTP method
+            url: Full URL
+            idempotent: Whether the request may be replayed after an ambiguous failure
+            **kwargs: Forwarded to requests.Session.request
+            
+        Returns:
+            Decoded JSON response
+        """
+        kwargs.setdefault("headers", self.headers)
+        attempt = 0
+        
+        while True:
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.retry.max_retries or not self.retry.should_retry_error(e, idempotent):
+                    raise
+                time.sleep(self.retry.backoff(attempt))
+            else:
+                if response.ok or attempt >= self.retry.max_retries \
+                        or not self.retry.should_retry_status(response.status_code, idempotent):
+                    response.raise_for_status()
+                    return response.json()
+                
+                delay = self.retry.backoff(attempt)
+                retry_after = _retry_after(response)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                if response.status_code == 429 and self.rate_limiter:
+                    self.rate_limiter.pause(delay)
+                time.sleep(delay)
+            
+            attempt += 1
+            self.retries += 1
+    
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
     def request_token(self, name: str, email: str) -> Dict:
         """
@@ -48,15 +296,13 @@ class SphinxAPIClient:
         Returns:
             Response from the API
         """
-        url = f"{self.BASE_URL}/api/auth/request-token/"
+        url = f"{self.base_url}/api/auth/request-token/"
         payload = {
             "name": name,
             "email": email
         }
         
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        return response.json()
+        return self._request("POST", url, idempotent=False, json=payload, headers=None)
     
     def start_episode(self) -> Dict:
         """
@@ -70,11 +316,12 @@ class SphinxAPIClient:
                 - steps_taken: Number of trips taken
                 - status_message: Status message
         """
-        url = f"{self.BASE_URL}/api/mortys/start/"
+        url = f"{self.base_url}/api/mortys/start/"
         
-        response = requests.post(url, headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        # restarting an episode is safe to replay
+        result = self._request("POST", url, idempotent=True)
+        self.state.update(result)
+        return result
     
     def send_morties(self, planet: int, morty_count: int) -> Dict:
         """
@@ -99,33 +346,53 @@ class SphinxAPIClient:
         if morty_count not in [1, 2, 3]:
             raise ValueError("Morty count must be 1, 2, or 3")
         
-        url = f"{self.BASE_URL}/api/mortys/portal/"
+        url = f"{self.base_url}/api/mortys/portal/"
         payload = {
             "planet": planet,
             "morty_count": morty_count
         }
         
-        response = requests.post(url, json=payload, headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        try:
+            result = self._request("POST", url, idempotent=False, json=payload)
+        except Exception:
+            # the trip may or may not have been applied
+            self.state.invalidate()
+            raise
+        self.state.update(result)
+        return result
     
-    def get_status(self) -> Dict:
+    def get_status(self, refresh: bool = False) -> Dict:
         """
         Get current episode status.
         
+        Served from the client-side episode state when it is valid; the
+        server is only queried on first use, after invalidate_state(), after
+        a failed trip, or with refresh=True.
+        
+        Args:
+            refresh: Always query the server
+        
         Returns:
             Dict with keys:
                 - morties_in_citadel: Remaining Morties in Citadel
                 - morties_on_planet_jessica: Morties on Planet Jessica
                 - morties_lost: Total Morties lost
                 - steps_taken: Total trips taken
-                - status_message: Status message
+                - status_message: Status message (only when queried from
+                  the server)
         """
-        url = f"{self.BASE_URL}/api/mortys/status/"
+        if self.state.valid and not refresh:
+            return self.state.as_status()
+        
+        url = f"{self.base_url}/api/mortys/status/"
         
-        response = requests.get(url, headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        result = self._request("GET", url, idempotent=True)
+        self.state.update(result)
+        return result
+    
+    def invalidate_state(self):
+        """Drop the client-side episode state (next get_status hits the server)."""
+        self.state.invalidate()
     
     def get_planet_name(self, planet_index: int) -> str:
         """
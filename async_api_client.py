@@ -0,0 +1,232 @@
+"""
+Asyncio client for the Sphinx Morty Express Challenge API.
+
+Mirrors SphinxAPIClient (start_episode, send_morties, get_status) with
+coroutines, so many independent episodes (one per token) can be driven from
+a single event loop:
+
+    async def episode(client):
+        await client.start_episode()
+        ...
+
+    results = asyncio.run(run_episodes(episode, tokens))
+
+The HTTP layer is a transport object with a single coroutine
+request(method, url, headers, json) -> Dict. RequestsTransport runs a pooled
+requests.Session in a thread pool; any other object with the same coroutine
+(e.g. an in-process stand-in of the API) can be passed instead.
+"""
+
+import asyncio
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from api_client import SphinxAPIClient
+
+
+class RequestsTransport:
+    """HTTP transport running a pooled requests.Session in worker threads."""
+
+    def __init__(
+        self,
+        pool_size: int = 16,
+        timeout: Union[float, Tuple[float, float]] = (5.0, 30.0)
+    ):
+        """
+        Initialize the transport.
+
+        Args:
+            pool_size: Maximum number of concurrent requests / kept-alive connections
+            timeout: Request timeout in seconds, or (connect, read) tuple
+        """
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size)
+
+    async def request(self, method: str, url: str, headers: Optional[Dict] = None,
+                      json: Optional[Dict] = None) -> Dict:
+        """
+        Send a request and return the decoded JSON body.
+
+        Raises:
+            requests.HTTPError on non-2xx responses
+        """
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            self.executor,
+            partial(self.session.request, method, url,
+                    headers=headers, json=json, timeout=self.timeout)
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def close(self):
+        """Close the pooled connections and the worker threads."""
+        self.session.close()
+        self.executor.shutdown(wait=False)
+
+
+# event loop -> {token: (semaphore, max_concurrency)}
+_token_limiters = weakref.WeakKeyDictionary()
+
+
+def token_limiter(api_token: str, max_concurrency: int = 1) -> asyncio.Semaphore:
+    """
+    Semaphore shared by every client of the running loop using api_token.
+
+    The server keeps one episode per token, so by default requests of the
+    same token are serialized even if several clients share it.
+
+    Raises:
+        ValueError: If the token's semaphore was created with another
+                    max_concurrency (the limit is per token, not per client)
+    """
+    limiters = _token_limiters.setdefault(asyncio.get_running_loop(), {})
+    if api_token not in limiters:
+        limiters[api_token] = (asyncio.Semaphore(max_concurrency), max_concurrency)
+    semaphore, limit = limiters[api_token]
+    if limit != max_concurrency:
+        raise ValueError(
+            f"Token already limited to {limit} concurrent requests "
+            f"by another client; got max_concurrency={max_concurrency}"
+        )
+    return semaphore
+
+
+class AsyncSphinxAPIClient:
+    """Asyncio client for the Sphinx Morty Express Challenge API."""
+
+    BASE_URL = SphinxAPIClient.BASE_URL
+
+    def __init__(self, api_token: Optional[str] = None, transport=None,
+                 max_concurrency: int = 1, base_url: Optional[str] = None):
+        """
+        Initialize the async API client.
+
+        Args:
+            api_token: API token for authentication. If not provided,
+                      will try to load from SPHINX_API_TOKEN environment variable.
+            transport: Object with a request(method, url, headers, json) coroutine.
+                      Defaults to a RequestsTransport owned by this client.
+            max_concurrency: Maximum number of in-flight requests for this token
+            base_url: Server URL. If not provided, uses the SPHINX_BASE_URL
+                      environment variable, then BASE_URL.
+        """
+        load_dotenv()
+        self.api_token = api_token or os.getenv("SPHINX_API_TOKEN")
+        self.base_url = (base_url or os.getenv("SPHINX_BASE_URL") or self.BASE_URL).rstrip("/")
+
+        if not self.api_token:
+            raise ValueError(
+                "API token is required. Either pass it as an argument or "
+                "set SPHINX_API_TOKEN environment variable."
+            )
+
+        self.headers = {
+            "Authorization": f"Bearer {self.api_token}",
+            "Content-Type": "application/json"
+        }
+
+        self._owns_transport = transport is None
+        self.transport = transport or RequestsTransport()
+        self.max_concurrency = max_concurrency
+
+    async def _request(self, method: str, path: str, json: Optional[Dict] = None) -> Dict:
+        async with token_limiter(self.api_token, self.max_concurrency):
+            return await self.transport.request(
+                method, f"{self.base_url}{path}", headers=self.headers, json=json
+            )
+
+    async def start_episode(self) -> Dict:
+        """
+        Start a new episode (see SphinxAPIClient.start_episode).
+        """
+        return await self._request("POST", "/api/mortys/start/")
+
+    async def send_morties(self, planet: int, morty_count: int) -> Dict:
+        """
+        Send Morties through a portal (see SphinxAPIClient.send_morties).
+
+        Args:
+            planet: Planet index (0 = "On a Cob", 1 = Cronenberg, 2 = Purge Planet)
+            morty_count: Number of Morties to send (1-3)
+        """
+        if planet not in [0, 1, 2]:
+            raise ValueError("Planet must be 0, 1, or 2")
+
+        if morty_count not in [1, 2, 3]:
+            raise ValueError("Morty count must be 1, 2, or 3")
+
+        payload = {
+            "planet": planet,
+            "morty_count": morty_count
+        }
+        return await self._request("POST", "/api/mortys/portal/", json=payload)
+
+    async def get_status(self) -> Dict:
+        """
+        Get current episode status (see SphinxAPIClient.get_status).
+        """
+        return await self._request("GET", "/api/mortys/status/")
+
+    def get_planet_name(self, planet_index: int) -> str:
+        """
+        Get the name of a planet by its index.
+        """
+        planet_names = {
+            0: '"On a Cob" Planet',
+            1: "Cronenberg World",
+            2: "The Purge Planet"
+        }
+        return planet_names.get(planet_index, "Unknown Planet")
+
+    async def close(self):
+        """Close the transport if this client created it."""
+        if self._owns_transport:
+            await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+
+async def run_episodes(episode: Callable, tokens: List[str], transport=None,
+                       base_url: Optional[str] = None, **kwargs) -> List:
+    """
+    Drive one episode per token concurrently on the running event loop.
+
+    Args:
+        episode: Coroutine function called as episode(client, **kwargs)
+        tokens: API tokens, one independent episode each
+        transport: Shared transport (default: one RequestsTransport sized
+                   for all tokens)
+        base_url: Server URL (see AsyncSphinxAPIClient)
+        **kwargs: Forwarded to episode
+
+    Returns:
+        List of episode results (or raised exceptions), in token order
+    """
+    own_transport = transport is None
+    transport = transport or RequestsTransport(pool_size=max(1, len(tokens)))
+
+    clients = [AsyncSphinxAPIClient(token, transport=transport, base_url=base_url) for token in tokens]
+    try:
+        return await asyncio.gather(
+            *(episode(client, **kwargs) for client in clients),
+            return_exceptions=True
+        )
+    finally:
+        if own_transport:
+            await transport.close()
@@ -0,0 +1,318 @@
+"""
+Record/replay of SphinxAPIClient episodes.
+
+RecordingSphinxAPIClient captures every request/response pair of a real
+episode into a compact JSON-lines cassette (gzipped if the path ends in
+.gz). ReplaySphinxAPIClient serves a cassette through the same interface,
+from memory and without network:
+
+    - start_episode() rewinds to the beginning of the recorded episode
+    - send_morties() returns the recorded response as long as the strategy
+      sends to the recorded planet with the recorded count
+    - at the first divergence the episode branches to the local simulator,
+      which continues from the current counters and trip number; its planet
+      phases are fitted to the recorded trips (see fit_phases), but the
+      outcomes after the divergence are synthetic draws, not captured ones
+    - get_status() is always served from the replayed counters
+
+This allows re-running a strategy thousands of times against captured
+planet behaviour without spending tokens.
+"""
+
+import gzip
+import json
+import os
+import random
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from api_client import SphinxAPIClient
+from evaluate_strategy import LocalClient, play_bandit, summarize
+from local_env.local_env_ts import LocalMortyEnv
+from utils import survivors
+
+
+CASSETTE_VERSION = 1
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _lines(f):
+    # a gzip cassette still being recorded (or whose recorder crashed) is
+    # flushed but has no end-of-stream marker: stop at the last full entry
+    try:
+        for line in f:
+            if line.endswith("\n"):
+                yield line
+    except EOFError:
+        return
+
+
+class Cassette:
+    """
+    Parsed cassette: the recorded episodes, each a start response followed by
+    (planet, morty_count, response) trips.
+    """
+
+    def __init__(self, episodes: List[Dict], header: Optional[Dict] = None):
+        self.episodes = episodes
+        self.header = header or {}
+        # episode -> planet phases fitted by fit_phases, shared by the replays
+        self.phases = {}
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        """
+        Load a cassette written by RecordingSphinxAPIClient.
+
+        Args:
+            path: Cassette path (.jsonl or .jsonl.gz)
+
+        Returns:
+            Cassette
+        """
+        header = {}
+        episodes = []
+        with _open(path, "r") as f:
+            for line in _lines(f):
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if isinstance(entry, dict):
+                    header = entry
+                    continue
+
+                method, path_, payload, response = entry
+                if path_ == "/api/mortys/start/":
+                    episodes.append({"start": response, "trips": []})
+                elif path_ == "/api/mortys/portal/" and episodes:
+                    episodes[-1]["trips"].append(
+                        (payload["planet"], payload["morty_count"], response)
+                    )
+                # status calls are not needed: counters come with every trip
+
+        return cls(episodes, header)
+
+
+def fit_phases(trips: List, env, grid: int = 360) -> List[float]:
+    """
+    Maximum-likelihood phase of each planet of a LocalMortyEnv-like simulator
+    (periodic rates A*cos(w*t + phi) + C) given recorded trips.
+
+    Responses with "survived_count" are scored as binomial draws; API
+    responses, whose "survived" is a bool, as all-or-nothing trips. Planets
+    without recorded trips keep the simulator's random phase.
+
+    Args:
+        trips: Recorded (planet, morty_count, response) trips
+        env: Simulator with A, C, w and phi per planet
+        grid: Number of candidate phases in [0, 2*pi)
+
+    Returns:
+        Fitted phase of each planet
+    """
+    candidates = np.linspace(0, 2 * np.pi, grid, endpoint=False)
+    phases = list(env.phi)
+
+    for planet in range(len(phases)):
+        rows = [(r["steps_taken"] - 1, r["morties_sent"], survivors(r), "survived_count" in r)
+                for p, _, r in trips if p == planet]
+        if not rows:
+            continue
+        t, sent, saved, exact = (np.array(column) for column in zip(*rows))
+
+        rate = env.A[planet] * np.cos(env.w[planet] * t + candidates[:, None]) + env.C[planet]
+        rate = np.clip(rate, 1e-6, 1 - 1e-6)
+        all_or_nothing = np.where(saved == sent, sent * np.log(rate), np.log1p(-rate ** sent))
+        binomial = saved * np.log(rate) + (sent - saved) * np.log1p(-rate)
+        log_likelihood = np.where(exact, binomial, all_or_nothing).sum(axis=1)
+        phases[planet] = float(candidates[np.argmax(log_likelihood)])
+
+    return phases
+
+
+class RecordingSphinxAPIClient(SphinxAPIClient):
+    """SphinxAPIClient that appends every request/response pair to a cassette."""
+
+    def __init__(self, cassette_path: str, *args, **kwargs):
+        """
+        Args:
+            cassette_path: Cassette to append to (.jsonl or .jsonl.gz)
+            *args, **kwargs: Forwarded to SphinxAPIClient
+        """
+        super().__init__(*args, **kwargs)
+        self.cassette_path = cassette_path
+        is_new = not os.path.isfile(cassette_path)
+        self._cassette = _open(cassette_path, "a")
+        if is_new:
+            header = {
+                "version": CASSETTE_VERSION,
+                "base_url": self.base_url,
+                "recorded_at": datetime.now().isoformat(timespec="seconds")
+            }
+            self._cassette.write(json.dumps(header) + "\n")
+            self._cassette.flush()
+
+    def _request(self, method: str, url: str, idempotent: bool, **kwargs) -> Dict:
+        result = super()._request(method, url, idempotent, **kwargs)
+        entry = [method, urlsplit(url).path, kwargs.get("json"), result]
+        self._cassette.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        # a crash must not lose the trips already paid for
+        self._cassette.flush()
+        return result
+
+    def close(self):
+        """Close the cassette and the pooled connections."""
+        self._cassette.close()
+        super().close()
+
+
+class ReplaySphinxAPIClient(SphinxAPIClient):
+    """
+    SphinxAPIClient serving a recorded episode from memory, branching to the
+    local simulator when the strategy diverges from the recording.
+    """
+
+    def __init__(self, cassette, episode: int = 0, env_factory: Callable = LocalMortyEnv):
+        """
+        Args:
+            cassette: Cassette or path of a cassette file. Pass a loaded
+                      Cassette to share it between many replays.
+            episode: Index of the recorded episode to replay
+            env_factory: Environment factory of the simulator used after divergence
+        """
+        # Placeholder token and URL: _request never reaches the network
+        super().__init__(api_token="replay", base_url="replay://cassette")
+
+        self.cassette = cassette if isinstance(cassette, Cassette) else Cassette.load(cassette)
+        self.episode = episode
+        self.recording = self.cassette.episodes[episode]
+        self.env_factory = env_factory
+
+        self.position = 0
+        self.simulator = None
+        self.diverged_at = None
+
+    def _branch(self):
+        """
+        Continue the episode on the local simulator from the current counters,
+        with its planet phases fitted to the recorded trips.
+        """
+        status = self.state.as_status()
+        simulator = LocalClient(self.env_factory, total_morties=self.recording["start"]["morties_in_citadel"])
+        if hasattr(simulator.env, "phi"):
+            if self.episode not in self.cassette.phases:
+                self.cassette.phases[self.episode] = fit_phases(self.recording["trips"], simulator.env)
+            simulator.env.phi = list(self.cassette.phases[self.episode])
+        simulator.morties_in_citadel = status["morties_in_citadel"]
+        simulator.morties_on_planet_jessica = status["morties_on_planet_jessica"]
+        simulator.morties_lost = status["morties_lost"]
+        simulator.steps_taken = status["steps_taken"]
+        simulator.env.t = status["steps_taken"]
+        self.simulator = simulator
+        self.diverged_at = self.position
+
+    def _request(self, method: str, url: str, idempotent: bool, **kwargs) -> Dict:
+        path = urlsplit(url).path
+        payload = kwargs.get("json") or {}
+
+        if path == "/api/mortys/start/":
+            self.position = 0
+            self.simulator = None
+            self.diverged_at = None
+            return dict(self.recording["start"])
+
+        if path == "/api/mortys/status/":
+            return self.state.as_status()
+
+        if path == "/api/mortys/portal/":
+            planet, morty_count = payload["planet"], payload["morty_count"]
+
+            if self.simulator is None:
+                trips = self.recording["trips"]
+                if self.position < len(trips) and trips[self.position][:2] == (planet, morty_count):
+                    self.position += 1
+                    return dict(trips[self.position - 1][2])
+                self._branch()
+
+            return self.simulator.send_morties(planet, morty_count)
+
+        raise ValueError(f"Cannot replay {method} {path}")
+
+    @property
+    def simulated_trips(self) -> int:
+        """Number of trips served by the simulator since the divergence."""
+        if self.simulator is None:
+            return 0
+        return self.state.steps_taken - self.recording["start"]["steps_taken"] - self.diverged_at
+
+
+def replay_episode(make_policy: Callable, cassette: Cassette, seed: int,
+                   episode: int = 0, morties_per_trip: int = 3) -> Dict:
+    """
+    Replay one recorded episode with a strategy (see evaluate_strategy.run_episode).
+
+    Returns:
+        Dict with seed, saved, lost, steps, saved_fraction, replayed and
+        simulated trip counts
+    """
+    np.random.seed(seed)
+    random.seed(seed)
+
+    client = ReplaySphinxAPIClient(cassette, episode=episode)
+    start = client.start_episode()
+    policy = make_policy()
+
+    if hasattr(policy, "select_arm"):
+        play_bandit(policy, client, morties_per_trip)
+    else:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            policy(client, morties_per_trip)
+
+    status = client.get_status()
+    return {
+        "seed": seed,
+        "saved": status["morties_on_planet_jessica"],
+        "lost": status["morties_lost"],
+        "steps": status["steps_taken"],
+        "saved_fraction": status["morties_on_planet_jessica"] / start["morties_in_citadel"],
+        "replayed_trips": client.position,
+        "simulated_trips": client.simulated_trips
+    }
+
+
+def evaluate_on_cassette(make_policy: Callable, cassette_path: str, n_episodes: int = 1000,
+                         seed: int = 0, episode: int = 0, morties_per_trip: int = 3) -> Dict:
+    """
+    Score a strategy by replaying a recorded episode n_episodes times.
+
+    Args:
+        make_policy: Policy factory (see evaluate_strategy.run_episode)
+        cassette_path: Cassette file
+        n_episodes: Number of replays
+        seed: Base seed of the strategy RNGs
+        episode: Index of the recorded episode
+        morties_per_trip: Number of Morties per trip (1-3)
+
+    Returns:
+        Summary dict (see evaluate_strategy.summarize) plus the mean number
+        of trips replayed before divergence
+    """
+    cassette = Cassette.load(cassette_path)
+    seeds = np.random.SeedSequence(seed).generate_state(n_episodes)
+    results = [
+        replay_episode(make_policy, cassette, int(s), episode, morties_per_trip)
+        for s in seeds
+    ]
+
+    summary = summarize([r["saved_fraction"] for r in results])
+    summary["mean_replayed_trips"] = float(np.mean([r["replayed_trips"] for r in results]))
+    return summary
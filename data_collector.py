@@ -4,8 +4,143 @@ Data collection and analysis functions for the Morty Express Challenge.
 
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from api_client import SphinxAPIClient
+from trip_buffer import TripBuffer
+from trip_store import load_trips, save_trips
+from utils import PLANET_NAMES
+
+
+class PlanetStatsIndex:
+    """
+    Per-planet running statistics of a trip log, updated as trips arrive.
+    
+    For each planet it keeps the cumulative sums of survived and morties_sent
+    over that planet's trips, so the trip count, totals, early/late halves
+    (split at the planet's midpoint, as in analyze_risk_changes) and the last
+    N trips are differences of two entries: O(1) per planet, whatever the
+    length of the log. It also keeps the position of each trip in the whole
+    log, for windows starting at a given trip (since).
+    """
+    
+    def __init__(self, n_planets: int = len(PLANET_NAMES), capacity: int = 1024):
+        """
+        Initialize an empty index.
+        
+        Args:
+            n_planets: Number of planets
+            capacity: Initial number of trips per planet; doubled when full
+        """
+        self.n_planets = n_planets
+        self.n_trips = 0
+        self.count = np.zeros(n_planets, dtype=np.int64)
+        # cum_*[p, k]: sum over the first k trips to planet p
+        self.cum_survived = np.zeros((n_planets, capacity + 1))
+        self.cum_sent = np.zeros((n_planets, capacity + 1))
+        # step[p, k]: position of the k-th trip to planet p in the whole log
+        self.step = np.zeros((n_planets, capacity), dtype=np.int64)
+        self._rows = np.arange(n_planets)
+    
+    def _reserve(self, size: int):
+        capacity = self.cum_survived.shape[1] - 1
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name in ("cum_survived", "cum_sent"):
+            old = getattr(self, name)
+            new = np.zeros((self.n_planets, capacity + 1))
+            new[:, :old.shape[1]] = old
+            setattr(self, name, new)
+        step = np.zeros((self.n_planets, capacity), dtype=np.int64)
+        step[:, :self.step.shape[1]] = self.step
+        self.step = step
+    
+    def add(self, planet: int, survived: int, morties_sent: int = 1):
+        """Record one trip."""
+        k = self.count[planet]
+        self._reserve(k + 1)
+        self.cum_survived[planet, k + 1] = self.cum_survived[planet, k] + survived
+        self.cum_sent[planet, k + 1] = self.cum_sent[planet, k] + morties_sent
+        self.step[planet, k] = self.n_trips
+        self.count[planet] = k + 1
+        self.n_trips += 1
+    
+    def add_many(self, planets, survived, morties_sent=None):
+        """Record trips in order (one cumulative sum per planet)."""
+        planets = np.asarray(planets, dtype=np.int64)
+        survived = np.asarray(survived, dtype=float)
+        morties_sent = np.ones(len(planets)) if morties_sent is None else np.asarray(morties_sent, dtype=float)
+        
+        order = np.argsort(planets, kind="stable")
+        new = np.bincount(planets, minlength=self.n_planets)
+        self._reserve(int((self.count + new).max()))
+        bounds = np.concatenate([[0], np.cumsum(new)])
+        for p in np.flatnonzero(new):
+            rows = order[bounds[p]:bounds[p + 1]]
+            k = self.count[p]
+            stop = k + len(rows) + 1
+            self.cum_survived[p, k + 1:stop] = self.cum_survived[p, k] + np.cumsum(survived[rows])
+            self.cum_sent[p, k + 1:stop] = self.cum_sent[p, k] + np.cumsum(morties_sent[rows])
+            self.step[p, k:stop - 1] = self.n_trips + rows
+            self.count[p] += len(rows)
+        self.n_trips += len(planets)
+    
+    @classmethod
+    def from_trips(cls, trips, n_planets: Optional[int] = None) -> "PlanetStatsIndex":
+        """
+        Build an index from a TripBuffer or DataFrame of trips.
+        
+        Args:
+            trips: Trips with planet and survived (and optionally morties_sent)
+            n_planets: Number of planets (default: enough for every planet seen)
+        """
+        column = trips.column if isinstance(trips, TripBuffer) else (lambda name: trips[name].to_numpy())
+        planets = np.asarray(column("planet"), dtype=np.int64)
+        if n_planets is None:
+            n_planets = max(len(PLANET_NAMES), int(planets.max()) + 1 if len(planets) else 0)
+        
+        index = cls(n_planets, capacity=max(1, int(np.bincount(planets).max()) if len(planets) else 1))
+        index.add_many(planets, np.asarray(column("survived"), dtype=float),
+                       column("morties_sent") if "morties_sent" in trips.columns else None)
+        return index
+    
+    def _window(self, start, stop):
+        """Trips, survived and sent over trips [start, stop) of each planet."""
+        trips = stop - start
+        survived = self.cum_survived[self._rows, stop] - self.cum_survived[self._rows, start]
+        sent = self.cum_sent[self._rows, stop] - self.cum_sent[self._rows, start]
+        return trips, survived, sent
+    
+    def totals(self):
+        """(trips, survived, morties_sent) of each planet."""
+        return self._window(np.zeros_like(self.count), self.count)
+    
+    def halves(self):
+        """(early, late) windows of each planet, split at its midpoint (see _window)."""
+        mid = self.count // 2
+        return self._window(np.zeros_like(self.count), mid), self._window(mid, self.count)
+    
+    def recent(self, n_trips: int):
+        """Window of the last n_trips trips of each planet (see _window)."""
+        return self._window(np.maximum(self.count - n_trips, 0), self.count)
+    
+    def since(self, step: int):
+        """Window of the trips made since trip number step of the whole log (see _window)."""
+        start = np.array([np.searchsorted(self.step[p, :self.count[p]], step)
+                          for p in range(self.n_planets)], dtype=np.int64)
+        return self._window(start, self.count)
+    
+    @staticmethod
+    def rate(window, per: str = "morty") -> np.ndarray:
+        """
+        Survival rate of a window: per Morty sent, or the mean of survived
+        per trip (per="trip"). NaN for planets without trips in the window.
+        """
+        trips, survived, sent = window
+        denominator = sent if per == "morty" else trips
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(denominator > 0, survived / denominator, np.nan)
 
 
 class DataCollector:
@@ -19,7 +154,37 @@ class DataCollector:
             client: SphinxAPIClient instance
         """
         self.client = client
-        self.trips_data = []
+        self.trips = TripBuffer()
+        self.stats = PlanetStatsIndex()
+    
+    @property
+    def trips_data(self) -> TripBuffer:
+        """All collected trips, as a columnar TripBuffer."""
+        return self.trips
+    
+    @trips_data.setter
+    def trips_data(self, trips):
+        """Replace the collected trips (TripBuffer, DataFrame or list of dicts)."""
+        if isinstance(trips, TripBuffer):
+            self.trips = trips
+        elif isinstance(trips, pd.DataFrame):
+            self.trips = TripBuffer.from_dataframe(trips)
+        else:
+            self.trips = TripBuffer()
+            self.trips.extend(trips)
+        self.stats = PlanetStatsIndex.from_trips(self.trips)
+    
+    def record(self, planet: int, result: Dict, **extra):
+        """
+        Log one send_morties response and update the per-planet statistics.
+        
+        Args:
+            planet: Planet the Morties were sent to
+            result: API response
+            **extra: Other trip fields (e.g. trip_number)
+        """
+        self.trips.append_result(planet, result, **extra)
+        self.stats.add(planet, result.get("survived", 0), result.get("morties_sent", 1))
     
     def explore_planet(self, planet: int, num_trips: int, morty_count: int = 1) -> pd.DataFrame:
         """
@@ -36,26 +201,12 @@ class DataCollector:
         print(f"\nExploring {self.client.get_planet_name(planet)}...")
         print(f"Sending {num_trips} trips with {morty_count} Morties each")
         
-        trips = []
+        start = len(self.trips)
         
         for i in range(num_trips):
             try:
                 result = self.client.send_morties(planet, morty_count)
-                
-                trip_data = {
-                    'trip_number': i + 1,
-                    'planet': planet,
-                    'planet_name': self.client.get_planet_name(planet),
-                    'morties_sent': result['morties_sent'],
-                    'survived': result['survived'],
-                    'steps_taken': result['steps_taken'],
-                    'morties_in_citadel': result['morties_in_citadel'],
-                    'morties_on_planet_jessica': result['morties_on_planet_jessica'],
-                    'morties_lost': result['morties_lost']
-                }
-                
-                trips.append(trip_data)
-                self.trips_data.append(trip_data)
+                self.record(planet, result, trip_number=i + 1)
                 
                 if (i + 1) % 10 == 0:
                     print(f"  Completed {i + 1}/{num_trips} trips")
@@ -64,7 +215,7 @@ class DataCollector:
                 print(f"Error on trip {i + 1}: {e}")
                 break
         
-        df = pd.DataFrame(trips)
+        df = self.trips.to_dataframe(start=start)
         
         if len(df) > 0:
             survival_rate = df['survived'].mean() * 100
@@ -93,7 +244,8 @@ class DataCollector:
         
         # Start a new episode
         self.client.start_episode()
-        self.trips_data = []
+        self.trips.clear()
+        self.stats = PlanetStatsIndex()
         
         all_data = []
         
@@ -145,101 +297,95 @@ class DataCollector:
         
         return result
     
-    def analyze_risk_changes(self, df: pd.DataFrame) -> Dict:
+    def analyze_risk_changes(self, df: Optional[pd.DataFrame] = None) -> Dict:
         """
         Analyze how risk changes over time for each planet.
         
         Args:
-            df: DataFrame with trip data
+            df: DataFrame with trip data (default: the collected trips, read
+                from the running statistics without scanning them)
             
         Returns:
             Dictionary with risk analysis for each planet
         """
-        analysis = {}
+        stats = self.stats if df is None else PlanetStatsIndex.from_trips(df)
+        early, late = stats.halves()
+        early_survival = stats.rate(early, per="trip")
+        late_survival = stats.rate(late, per="trip")
+        overall_survival = stats.rate(stats.totals(), per="trip")
+        change = late_survival - early_survival
         
-        for planet in df['planet'].unique():
-            planet_data = df[df['planet'] == planet].copy()
-            planet_name = planet_data['planet_name'].iloc[0]
-            
-            # Split into early and late trips
-            mid_point = len(planet_data) // 2
-            early = planet_data.iloc[:mid_point]
-            late = planet_data.iloc[mid_point:]
-            
-            early_survival = early['survived'].mean()
-            late_survival = late['survived'].mean()
-            change = late_survival - early_survival
-            
-            analysis[planet_name] = {
-                'planet': planet,
-                'early_survival_rate': early_survival * 100,
-                'late_survival_rate': late_survival * 100,
-                'change': change * 100,
-                'trend': 'improving' if change > 0 else 'worsening',
-                'total_trips': len(planet_data),
-                'overall_survival_rate': planet_data['survived'].mean() * 100
+        analysis = {}
+        for planet in np.flatnonzero(stats.count):
+            analysis[PLANET_NAMES.get(planet, f"Planet {planet}")] = {
+                'planet': int(planet),
+                'early_survival_rate': early_survival[planet] * 100,
+                'late_survival_rate': late_survival[planet] * 100,
+                'change': change[planet] * 100,
+                'trend': 'improving' if change[planet] > 0 else 'worsening',
+                'total_trips': int(stats.count[planet]),
+                'overall_survival_rate': overall_survival[planet] * 100
             }
         
         return analysis
     
-    def get_best_planet(self, df: pd.DataFrame, consider_trend: bool = True) -> Tuple[int, str]:
+    def get_best_planet(self, df: Optional[pd.DataFrame] = None,
+                        consider_trend: bool = True) -> Tuple[int, str]:
         """
         Determine the best planet to use based on collected data.
         
         Args:
-            df: DataFrame with trip data
+            df: DataFrame with trip data (default: the collected trips, an
+                O(1) query of the running statistics)
             consider_trend: Whether to consider trend in addition to survival rate
             
         Returns:
             Tuple of (planet_index, planet_name)
         """
+        stats = self.stats if df is None else PlanetStatsIndex.from_trips(df)
         if consider_trend:
-            analysis = self.analyze_risk_changes(df)
-            
             # Score based on late survival rate (more recent data)
-            best_planet = max(
-                analysis.items(),
-                key=lambda x: x[1]['late_survival_rate']
-            )
-            
-            planet_name = best_planet[0]
-            planet_index = int(best_planet[1]['planet'])  # Convert to Python int
-            
+            score = stats.rate(stats.halves()[1], per="trip")
         else:
             # Simple overall survival rate
-            planet_rates = df.groupby(['planet', 'planet_name'])['survived'].mean()
-            best = planet_rates.idxmax()
-            planet_index, planet_name = best
-            planet_index = int(planet_index)  # Convert to Python int
+            score = stats.rate(stats.totals(), per="trip")
         
-        return planet_index, planet_name
+        if np.isnan(score).all():
+            raise ValueError("No trip data to choose a planet from")
+        planet_index = int(np.nanargmax(score))
+        return planet_index, PLANET_NAMES.get(planet_index, f"Planet {planet_index}")
     
     def save_data(self, filename: str = "trips_data.csv"):
         """
-        Save collected trip data to a CSV file.
+        Save collected trip data.
         
         Args:
-            filename: Name of the CSV file
+            filename: Name of the CSV file, or of a typed dataset directory
+                      (Parquet, or .npz without pyarrow; see trip_store)
         """
-        if self.trips_data:
-            df = pd.DataFrame(self.trips_data)
-            df.to_csv(filename, index=False)
+        if len(self.trips) > 0:
+            df = self.trips.to_dataframe()
+            if filename.endswith(".csv"):
+                df.to_csv(filename, index=False)
+            else:
+                # unpartitioned: the log keeps its trip order
+                save_trips(df, filename, partition_cols=(), mode="overwrite")
             print(f"\nData saved to {filename}")
         else:
             print("No data to save")
     
     def load_data(self, filename: str = "trips_data.csv") -> pd.DataFrame:
         """
-        Load trip data from a CSV file.
+        Load trip data from a CSV file or a typed dataset directory.
         
         Args:
-            filename: Name of the CSV file
+            filename: Name of the CSV file or dataset directory
             
         Returns:
             DataFrame with trip data
         """
-        df = pd.read_csv(filename)
-        self.trips_data = df.to_dict('records')
+        df = load_trips(filename)
+        self.trips_data = df
         print(f"\nLoaded {len(df)} trips from {filename}")
         return df
 
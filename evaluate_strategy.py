@@ -0,0 +1,460 @@
+"""
+Monte-Carlo evaluation of strategies against the local simulator.
+
+Runs many independent 1000-Morty episodes of a strategy on LocalMortyEnv,
+fanned out over a ProcessPoolExecutor, and reports the distribution of the
+fraction of Morties saved.
+
+Two kinds of strategies are supported:
+    - bandit policies exposing select_arm() and observe()/update()
+      (ChangeAwareStickyTS, SlidingWindowTS)
+    - client-driven strategies wrapped in a driver callable
+      driver(client, morties_per_trip) (see EKFSinusDriver)
+
+Policies are built in the worker processes by a picklable factory, e.g.
+functools.partial(ChangeAwareStickyTS, cusum_h=4.0). Lambdas cannot be sent
+to worker processes.
+"""
+
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from local_env.local_env_ts import BatchLocalMortyEnv, LocalMortyEnv
+from utils import PLANET_NAMES, survivors
+
+
+class LocalClient:
+    """
+    Stand-in for SphinxAPIClient backed by a local simulator.
+
+    Mirrors start_episode / send_morties / get_status / get_planet_name and
+    returns dicts with the same keys as the API. As in the API, "survived"
+    is a bool: True when every Morty of the batch reached Planet Jessica.
+    The simulator's exact number of survivors is added as "survived_count"
+    (see utils.survivors).
+    """
+
+    def __init__(self, env_factory: Callable = LocalMortyEnv, total_morties: int = 1000):
+        """
+        Initialize the local client.
+
+        Args:
+            env_factory: Callable returning a fresh environment with
+                         send(planet, morty_count) -> (successes, trials)
+            total_morties: Number of Morties in the Citadel at episode start
+        """
+        self.env_factory = env_factory
+        self.total_morties = total_morties
+        self.start_episode()
+
+    def start_episode(self) -> Dict:
+        """Start a new episode on a freshly drawn environment."""
+        self.env = self.env_factory()
+        self.morties_in_citadel = self.total_morties
+        self.morties_on_planet_jessica = 0
+        self.morties_lost = 0
+        self.steps_taken = 0
+        return self.get_status()
+
+    def send_morties(self, planet: int, morty_count: int) -> Dict:
+        """
+        Send Morties through a portal of the simulated environment.
+
+        Args:
+            planet: Planet index (0, 1 or 2)
+            morty_count: Number of Morties to send (1-3)
+
+        Returns:
+            Dict with the same keys as SphinxAPIClient.send_morties
+        """
+        if planet not in [0, 1, 2]:
+            raise ValueError("Planet must be 0, 1, or 2")
+
+        if morty_count not in [1, 2, 3]:
+            raise ValueError("Morty count must be 1, 2, or 3")
+
+        if self.morties_in_citadel <= 0:
+            raise ValueError("No Morties left in the Citadel")
+
+        morty_count = min(morty_count, self.morties_in_citadel)
+        survived, _ = self.env.send(planet, morty_count)
+        survived = int(survived)
+
+        self.morties_in_citadel -= morty_count
+        self.morties_on_planet_jessica += survived
+        self.morties_lost += morty_count - survived
+        self.steps_taken += 1
+
+        return {
+            "morties_sent": morty_count,
+            "survived": survived == morty_count,
+            "survived_count": survived,
+            "morties_in_citadel": self.morties_in_citadel,
+            "morties_on_planet_jessica": self.morties_on_planet_jessica,
+            "morties_lost": self.morties_lost,
+            "steps_taken": self.steps_taken
+        }
+
+    def get_status(self) -> Dict:
+        """Get current episode status."""
+        return {
+            "morties_in_citadel": self.morties_in_citadel,
+            "morties_on_planet_jessica": self.morties_on_planet_jessica,
+            "morties_lost": self.morties_lost,
+            "steps_taken": self.steps_taken,
+            "status_message": "local episode"
+        }
+
+    def get_planet_name(self, planet_index: int) -> str:
+        """Get the name of a planet by its index."""
+        return PLANET_NAMES.get(planet_index, "Unknown Planet")
+
+
+class EKFSinusDriver:
+    """Runs EKFSinusStrategy (explore then exploit) on a client."""
+
+    def __init__(self, explore_steps: int = 80):
+        self.explore_steps = explore_steps
+
+    def __call__(self, client, morties_per_trip: int):
+        from strategy_ekf_sinus import EKFSinusStrategy
+
+        strat = EKFSinusStrategy(client, explore_steps=self.explore_steps)
+        strat.explore()
+        strat.exploit(batch=morties_per_trip)
+
+
+class RLSSinusDriver:
+    """Runs RLSSinusStrategy (explore then exploit) on a client."""
+
+    def __init__(self, explore_trips: int = 30, **params):
+        self.explore_trips = explore_trips
+        self.params = params
+
+    def __call__(self, client, morties_per_trip: int):
+        from strategy_rls_sinus import RLSSinusStrategy
+
+        strat = RLSSinusStrategy(client, **self.params)
+        strat.explore_phase(trips_per_planet=self.explore_trips)
+        strat.execute_strategy(morties_per_trip=morties_per_trip)
+
+
+def play_bandit(policy, client, morties_per_trip: int = 3):
+    """
+    Play a bandit policy until the Citadel is empty.
+
+    Args:
+        policy: Object with select_arm() and observe() or update()
+        client: SphinxAPIClient-like client
+        morties_per_trip: Number of Morties per trip (1-3)
+    """
+    feedback = getattr(policy, "observe", None) or policy.update
+    remaining = client.get_status()["morties_in_citadel"]
+
+    while remaining > 0:
+        arm = int(policy.select_arm())
+        result = client.send_morties(arm, min(morties_per_trip, remaining))
+        feedback(arm, survivors(result), result["morties_sent"])
+        remaining = result["morties_in_citadel"]
+
+
+def run_episode(make_policy: Callable, seed: int, morties_per_trip: int = 3,
+                total_morties: int = 1000, env_factory: Callable = LocalMortyEnv) -> Dict:
+    """
+    Run one seeded episode of a strategy on the local simulator.
+
+    Args:
+        make_policy: Picklable factory returning a bandit policy or a driver
+        seed: Seed for both numpy's global RNG and the random module
+        morties_per_trip: Number of Morties per trip (1-3)
+        total_morties: Number of Morties in the Citadel
+        env_factory: Environment factory used by LocalClient
+
+    Returns:
+        Dict with seed, saved, lost, steps and saved_fraction
+    """
+    np.random.seed(seed)
+    random.seed(seed)
+
+    client = LocalClient(env_factory=env_factory, total_morties=total_morties)
+    policy = make_policy()
+
+    if hasattr(policy, "select_arm"):
+        play_bandit(policy, client, morties_per_trip)
+    else:
+        # client-driven strategies print every trip
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            policy(client, morties_per_trip)
+
+    status = client.get_status()
+    return {
+        "seed": seed,
+        "saved": status["morties_on_planet_jessica"],
+        "lost": status["morties_lost"],
+        "steps": status["steps_taken"],
+        "saved_fraction": status["morties_on_planet_jessica"] / total_morties
+    }
+
+
+def run_batch(policy, env, morties_per_trip: int = 3, total_morties: int = 1000) -> np.ndarray:
+    """
+    Play a batched policy on a batched environment until every Citadel is empty.
+
+    Args:
+        policy: Batched policy (e.g. BatchChangeAwareStickyTS) with
+                select_arm() -> (n,) arms and observe(arms, successes, trials),
+                and optionally trip_sizes(morties_per_trip) -> (n,) Morties
+                of each episode's next trip
+        env: Batched environment (e.g. BatchLocalMortyEnv) with the same n
+        morties_per_trip: Number of Morties per trip (1-3)
+        total_morties: Number of Morties in each Citadel
+
+    Returns:
+        Saved fraction of each episode, shape (n,)
+    """
+    n = env.n_episodes
+    remaining = np.full(n, total_morties, dtype=np.int64)
+    saved = np.zeros(n, dtype=np.int64)
+
+    while remaining.any():
+        active = remaining > 0
+        arms = policy.select_arm()
+        sizes = policy.trip_sizes(morties_per_trip) if hasattr(policy, "trip_sizes") else morties_per_trip
+        counts = np.clip(np.minimum(remaining, sizes), 1, None)
+        successes, trials = env.send(arms, counts, active=active)
+        policy.observe(arms, successes, trials)
+        saved += successes
+        remaining -= trials
+
+    return saved / total_morties
+
+
+def evaluate_batch(make_batch_policy: Callable, n_episodes: int = 10000, seed: int = 0,
+                   morties_per_trip: int = 3, total_morties: int = 1000) -> Dict:
+    """
+    Score a batched policy on n_episodes episodes simulated in lockstep.
+
+    Args:
+        make_batch_policy: Factory called as make_batch_policy(n_episodes, seed=...)
+        n_episodes: Number of episodes
+        seed: Base seed (the environment and the policy get independent streams)
+        morties_per_trip: Number of Morties per trip (1-3)
+        total_morties: Number of Morties in each Citadel
+
+    Returns:
+        Summary dict (see summarize)
+    """
+    env_seed, policy_seed = np.random.SeedSequence(seed).spawn(2)
+    env = BatchLocalMortyEnv(n_episodes, seed=env_seed)
+    policy = make_batch_policy(n_episodes, seed=policy_seed)
+    return summarize(run_batch(policy, env, morties_per_trip, total_morties))
+
+
+def _run_chunk(make_policy: Callable, seeds: List[int], episode_kwargs: Dict) -> List[Dict]:
+    return [run_episode(make_policy, seed, **episode_kwargs) for seed in seeds]
+
+
+def episode_seeds(n_episodes: int, seed: int = 0) -> List[int]:
+    """
+    Deterministic per-episode seeds derived from a base seed.
+
+    Seeds only depend on (seed, episode index), so results do not depend on
+    the number of workers or on scheduling order.
+    """
+    children = np.random.SeedSequence(seed).spawn(n_episodes)
+    return [int(c.generate_state(1)[0]) for c in children]
+
+
+def iter_episodes(make_policy: Callable, n_episodes: int, seed: int = 0,
+                  workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                  **episode_kwargs) -> Iterator[Dict]:
+    """
+    Run episodes in parallel and yield per-episode results as they complete.
+
+    Args:
+        make_policy: Picklable policy factory (see run_episode)
+        n_episodes: Number of episodes
+        seed: Base seed
+        workers: Number of worker processes (default: all cores, 1 = in-process)
+        chunk_size: Episodes per task (default: ~4 tasks per worker)
+        **episode_kwargs: Forwarded to run_episode
+
+    Yields:
+        Per-episode result dicts (completion order, not seed order)
+    """
+    workers = workers or os.cpu_count() or 1
+    seeds = episode_seeds(n_episodes, seed)
+
+    if workers == 1:
+        for s in seeds:
+            yield run_episode(make_policy, s, **episode_kwargs)
+        return
+
+    chunk_size = chunk_size or max(1, n_episodes // (workers * 4))
+    chunks = [seeds[i:i + chunk_size] for i in range(0, n_episodes, chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_run_chunk, make_policy, c, episode_kwargs) for c in chunks]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def summarize(saved_fractions) -> Dict:
+    """
+    Summarize a distribution of saved fractions.
+
+    Args:
+        saved_fractions: Sequence of per-episode saved fractions
+
+    Returns:
+        Dict with n, mean, std, 95% confidence interval of the mean,
+        min/max and the 5/25/50/75/95 percentiles
+
+    Raises:
+        ValueError: If saved_fractions is empty (e.g. n_episodes=0)
+    """
+    x = np.asarray(saved_fractions, dtype=float)
+    n = len(x)
+    if n == 0:
+        raise ValueError("Cannot summarize an empty set of episodes (n_episodes must be at least 1)")
+    mean = x.mean()
+    std = x.std(ddof=1) if n > 1 else 0.0
+    half_width = 1.96 * std / np.sqrt(n)
+    p5, p25, p50, p75, p95 = np.percentile(x, [5, 25, 50, 75, 95])
+
+    return {
+        "n": n,
+        "mean": mean,
+        "std": std,
+        "ci95_low": mean - half_width,
+        "ci95_high": mean + half_width,
+        "min": x.min(),
+        "p5": p5,
+        "p25": p25,
+        "p50": p50,
+        "p75": p75,
+        "p95": p95,
+        "max": x.max()
+    }
+
+
+def evaluate(make_policy: Callable, n_episodes: int = 10000, seed: int = 0,
+             workers: Optional[int] = None, on_result: Optional[Callable] = None,
+             **episode_kwargs) -> Dict:
+    """
+    Score one strategy configuration over many episodes.
+
+    Args:
+        make_policy: Picklable policy factory (see run_episode)
+        n_episodes: Number of episodes
+        seed: Base seed
+        workers: Number of worker processes (default: all cores)
+        on_result: Optional callback called with each episode result
+        **episode_kwargs: Forwarded to run_episode
+
+    Returns:
+        Summary dict (see summarize)
+    """
+    fractions = []
+    for result in iter_episodes(make_policy, n_episodes, seed=seed,
+                                workers=workers, **episode_kwargs):
+        fractions.append(result["saved_fraction"])
+        if on_result is not None:
+            on_result(result)
+
+    return summarize(fractions)
+
+
+def evaluate_many(make_policies: List[Callable], n_episodes: int, seed: int = 0,
+                  workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                  **episode_kwargs) -> List[Dict]:
+    """
+    Score several strategy configurations on the same episodes.
+
+    Every configuration sees the same per-episode seeds (common random
+    numbers), which makes differences between configurations much less noisy
+    than independent runs. All episodes share one process pool.
+
+    Args:
+        make_policies: List of picklable policy factories
+        n_episodes: Number of episodes per configuration
+        seed: Base seed
+        workers: Number of worker processes (default: all cores, 1 = in-process)
+        chunk_size: Episodes per task (default: ~4 tasks per worker)
+        **episode_kwargs: Forwarded to run_episode
+
+    Returns:
+        List of summary dicts, in the order of make_policies
+    """
+    workers = workers or os.cpu_count() or 1
+    seeds = episode_seeds(n_episodes, seed)
+    fractions = [[] for _ in make_policies]
+
+    if workers == 1:
+        for i, make_policy in enumerate(make_policies):
+            for result in _run_chunk(make_policy, seeds, episode_kwargs):
+                fractions[i].append(result["saved_fraction"])
+        return [summarize(f) for f in fractions]
+
+    total = n_episodes * len(make_policies)
+    chunk_size = chunk_size or max(1, min(n_episodes, total // (workers * 4)))
+    chunks = [seeds[i:i + chunk_size] for i in range(0, n_episodes, chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_run_chunk, make_policy, c, episode_kwargs): i
+            for i, make_policy in enumerate(make_policies)
+            for c in chunks
+        }
+        for future in as_completed(futures):
+            fractions[futures[future]].extend(r["saved_fraction"] for r in future.result())
+
+    return [summarize(f) for f in fractions]
+
+
+def print_summary(name: str, summary: Dict):
+    """Pretty print a summary returned by evaluate."""
+    print(f"\n{name}:")
+    print(f"  Episodes: {summary['n']}")
+    print(f"  Mean saved: {summary['mean']*100:.2f}% "
+          f"(95% CI {summary['ci95_low']*100:.2f}% - {summary['ci95_high']*100:.2f}%)")
+    print(f"  Std: {summary['std']*100:.2f}%")
+    print(f"  Percentiles: p5={summary['p5']*100:.1f}% p25={summary['p25']*100:.1f}% "
+          f"p50={summary['p50']*100:.1f}% p75={summary['p75']*100:.1f}% "
+          f"p95={summary['p95']*100:.1f}%")
+
+
+EPISODES = 2000
+
+
+def main():
+    from local_env.sliding_ts import SlidingWindowTS
+    from strat_second import ChangeAwareStickyTS
+
+    print("=== MONTE-CARLO STRATEGY EVALUATION ===")
+    print(f"{EPISODES} episodes per strategy, {os.cpu_count()} cores")
+
+    strategies = {
+        "ChangeAwareStickyTS": partial(
+            ChangeAwareStickyTS, n_arms=3, epsilon_probe=0.05, min_stick=2,
+            switch_margin=0.05, buffer_size=25, cusum_h=4.0, cusum_k=0.015,
+            forced_explore_after_reset=8, partial_reset=False
+        ),
+        "SlidingWindowTS": partial(SlidingWindowTS, n_arms=3, window=200),
+        "EKFSinusStrategy": partial(EKFSinusDriver, explore_steps=80),
+        "RLSSinusStrategy": partial(RLSSinusDriver, explore_trips=30),
+    }
+
+    for name, make_policy in strategies.items():
+        summary = evaluate(make_policy, n_episodes=EPISODES, seed=0)
+        print_summary(name, summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Live view of an episode in progress.
+
+The decision loop publishes each trip (and optionally a snapshot of the
+strategy state) with LiveDashboard.publish(), which never blocks: messages
+go to a bounded multiprocessing queue with put_nowait() and are dropped if
+the renderer falls behind. A separate renderer process keeps the recent
+trips in a ring buffer and refreshes the figure at a fixed frame rate by
+updating the existing artists (set_data), not by redrawing the history:
+
+    - rolling survival rate of each planet, with the strategy's posterior
+      means (ChangeAwareStickyTS) or predictions (EKF/RLS strategies)
+    - the arm chosen at each trip
+    - the CUSUM statistics of each arm against the threshold h
+
+Without a display (or with save_path) the renderer uses the Agg backend and
+rewrites save_path at each frame.
+
+    with LiveDashboard() as dashboard:
+        ...
+        result = client.send_morties(arm, 3)
+        strategy.observe(arm, survivors(result), result["morties_sent"])
+        dashboard.publish(arm, result, strategy)
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from utils import PLANET_NAMES, survivors
+
+
+COLORS = ('#FF6B6B', '#4ECDC4', '#45B7D1')
+
+
+def strategy_snapshot(strategy, t: Optional[int] = None) -> Optional[Tuple]:
+    """
+    Small picklable snapshot of a strategy's state.
+
+    Supports ChangeAwareStickyTS, ArrayChangeAwareStickyTS, EKFSinusStrategy
+    (or a {planet: EKFSinusPlanet} dict), RLSSinusStrategy, and anything with
+    a posterior_mean() returning one value per arm.
+
+    Args:
+        strategy: Strategy object
+        t: Global trip index, for time-dependent predictions of models
+           without their own clock (RLS estimator, bare EKF models)
+
+    Returns:
+        Tuple (means, cusum_pos, cusum_neg, h, current_arm); CUSUM entries
+        are None for strategies without change detection
+    """
+    if strategy is None:
+        return None
+
+    arms = getattr(strategy, "arms", None)
+    if arms is not None and hasattr(arms[0], "G_pos"):
+        return (
+            tuple(arm.posterior_mean() for arm in arms),
+            tuple(arm.G_pos for arm in arms),
+            tuple(arm.G_neg for arm in arms),
+            arms[0].h,
+            strategy.current_arm
+        )
+
+    if hasattr(strategy, "G_pos"):
+        return (
+            tuple(strategy.posterior_mean().tolist()),
+            tuple(strategy.G_pos.tolist()),
+            tuple(strategy.G_neg.tolist()),
+            strategy.h,
+            strategy.current_arm
+        )
+
+    models = getattr(strategy, "models", strategy if isinstance(strategy, dict) else None)
+    if isinstance(models, dict):
+        # EKFSinusStrategy keeps one clock per planet
+        clocks = getattr(strategy, "t", None)
+        means = tuple(
+            models[p].predict_prob(clocks[p] if isinstance(clocks, dict) else (t or 0))
+            for p in sorted(models)
+        )
+        return means, None, None, None, None
+
+    estimator = getattr(strategy, "estimator", None)
+    if estimator is not None and t is not None:
+        return tuple(np.clip(estimator.predict(t), 0, 1).tolist()), None, None, None, None
+
+    if hasattr(strategy, "posterior_mean"):
+        return tuple(np.asarray(strategy.posterior_mean(), dtype=float).tolist()), None, None, None, None
+
+    return None
+
+
+class TripRing:
+    """Fixed-capacity ring buffer of recent trips, one NumPy array per field."""
+
+    def __init__(self, capacity: int, n_arms: int = 3):
+        self.capacity = capacity
+        self.step = np.zeros(capacity, dtype=np.int64)
+        self.planet = np.zeros(capacity, dtype=np.int8)
+        self.rate = np.zeros(capacity)
+        self.means = np.full((capacity, n_arms), np.nan)
+        self.head = 0
+        self.count = 0
+
+    def append(self, step, planet, survived, sent, means=None):
+        i = self.head
+        self.step[i] = step
+        self.planet[i] = planet
+        self.rate[i] = survived / sent if sent else 0.0
+        self.means[i] = np.nan if means is None else means
+        self.head = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def ordered(self, field: str) -> np.ndarray:
+        """Contents of a field, oldest first."""
+        values = getattr(self, field)
+        if self.count < self.capacity:
+            return values[:self.count]
+        return np.concatenate([values[self.head:], values[:self.head]])
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    csum = np.concatenate([[0.0], np.cumsum(values)])
+    idx = np.arange(1, len(values) + 1)
+    start = np.maximum(idx - window, 0)
+    return (csum[idx] - csum[start]) / (idx - start)
+
+
+def _render_loop(messages, n_arms: int, capacity: int, window: int, fps: float,
+                 save_path: Optional[str]):
+    import matplotlib
+    if save_path or (os.name == "posix" and not os.environ.get("DISPLAY")):
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    interactive = matplotlib.get_backend().lower() != "agg"
+    ring = TripRing(capacity, n_arms)
+    cusum = {"pos": np.zeros(n_arms), "neg": np.zeros(n_arms), "h": None, "arm": None}
+
+    fig, (ax_rate, ax_arm, ax_cusum) = plt.subplots(
+        3, 1, figsize=(12, 9), gridspec_kw={"height_ratios": [3, 1, 1.5]}
+    )
+    names = [PLANET_NAMES.get(p, f"Planet {p}") for p in range(n_arms)]
+    rate_lines = [
+        ax_rate.plot([], [], color=COLORS[p % 3], linewidth=2, label=f"{names[p]} (MA-{window})")[0]
+        for p in range(n_arms)
+    ]
+    mean_lines = [
+        ax_rate.plot([], [], color=COLORS[p % 3], linewidth=1, linestyle="--")[0]
+        for p in range(n_arms)
+    ]
+    ax_rate.set_ylim(-0.05, 1.05)
+    ax_rate.set_ylabel("Survival rate")
+    ax_rate.set_title("Rolling survival (solid) and strategy estimate (dashed)", fontweight="bold")
+    ax_rate.legend(loc="upper left", fontsize=9)
+    ax_rate.grid(True, alpha=0.3)
+
+    arm_points = ax_arm.scatter([], [], s=6)
+    ax_arm.set_ylim(-0.5, n_arms - 0.5)
+    ax_arm.set_yticks(range(n_arms))
+    ax_arm.set_ylabel("Arm")
+    ax_arm.grid(True, alpha=0.3)
+
+    x = np.arange(n_arms)
+    pos_bars = ax_cusum.bar(x - 0.2, np.zeros(n_arms), 0.4, color=COLORS[:n_arms], label="G+")
+    neg_bars = ax_cusum.bar(x + 0.2, np.zeros(n_arms), 0.4, color=COLORS[:n_arms], alpha=0.5, label="G-")
+    threshold = ax_cusum.axhline(np.nan, color="black", linestyle=":", label="h")
+    ax_cusum.set_xticks(x)
+    ax_cusum.set_xticklabels(names)
+    ax_cusum.set_ylabel("CUSUM")
+    ax_cusum.legend(loc="upper right", fontsize=9)
+    fig.tight_layout()
+    if interactive:
+        plt.show(block=False)
+
+    def draw():
+        if ring.count == 0:
+            return
+        steps = ring.ordered("step")
+        planets = ring.ordered("planet")
+        rates = ring.ordered("rate")
+        means = ring.ordered("means")
+
+        for p in range(n_arms):
+            mine = planets == p
+            rate_lines[p].set_data(steps[mine], _rolling_mean(rates[mine], window))
+            mean_lines[p].set_data(steps, means[:, p])
+        arm_points.set_offsets(np.column_stack([steps, planets]))
+        arm_points.set_color([COLORS[p % 3] for p in planets])
+        lo, hi = steps[0], max(steps[-1], steps[0] + 1)
+        ax_rate.set_xlim(lo, hi)
+        ax_arm.set_xlim(lo, hi)
+
+        for bar, value in zip(pos_bars, cusum["pos"]):
+            bar.set_height(value)
+        for bar, value in zip(neg_bars, cusum["neg"]):
+            bar.set_height(value)
+        if cusum["h"] is not None:
+            threshold.set_ydata([cusum["h"], cusum["h"]])
+            ax_cusum.set_ylim(0, cusum["h"] * 1.1)
+        arm = cusum["arm"]
+        ax_arm.set_title(f"Trip {steps[-1]}" + (f" - current arm: {names[arm]}" if arm is not None else ""),
+                         fontsize=10)
+
+        if interactive:
+            fig.canvas.draw_idle()
+            fig.canvas.flush_events()
+        else:
+            fig.savefig(save_path or "live_dashboard.png", dpi=80)
+
+    period = 1.0 / fps
+    running = True
+    while running:
+        frame_start = time.monotonic()
+        # drain everything published since the last frame
+        while True:
+            try:
+                message = messages.get_nowait()
+            except queue.Empty:
+                break
+            if message is None:
+                running = False
+                break
+            step, planet, survived, sent, snapshot = message
+            means = snapshot[0] if snapshot else None
+            ring.append(step, planet, survived, sent, means)
+            if snapshot and snapshot[1] is not None:
+                cusum["pos"][:] = snapshot[1]
+                cusum["neg"][:] = snapshot[2]
+                cusum["h"] = snapshot[3]
+                cusum["arm"] = snapshot[4]
+
+        draw()
+        remaining = period - (time.monotonic() - frame_start)
+        if running and remaining > 0:
+            if interactive:
+                plt.pause(remaining)
+            else:
+                time.sleep(remaining)
+
+    plt.close(fig)
+
+
+class LiveDashboard:
+    """Non-blocking publisher feeding a live dashboard in a renderer process."""
+
+    def __init__(self, n_arms: int = 3, capacity: int = 2000, window: int = 20,
+                 fps: float = 5.0, save_path: Optional[str] = None, max_pending: int = 10000):
+        """
+        Args:
+            n_arms: Number of planets
+            capacity: Number of recent trips kept and drawn
+            window: Rolling-survival window, in trips of a planet
+            fps: Refresh rate of the figure
+            save_path: Write frames to this image instead of a window
+            max_pending: Queue size; trips published beyond it are dropped
+        """
+        self.n_arms = n_arms
+        self.capacity = capacity
+        self.window = window
+        self.fps = fps
+        self.save_path = save_path
+        self.max_pending = max_pending
+
+        self.dropped = 0
+        self._queue = None
+        self._process = None
+
+    def start(self):
+        """Start the renderer process."""
+        if self._process is not None:
+            return self
+        ctx = mp.get_context("spawn")
+        self._queue = ctx.Queue(maxsize=self.max_pending)
+        self._process = ctx.Process(
+            target=_render_loop,
+            args=(self._queue, self.n_arms, self.capacity, self.window, self.fps, self.save_path),
+            daemon=True
+        )
+        self._process.start()
+        return self
+
+    def publish(self, planet: int, result: Dict, strategy=None, snapshot: Optional[Tuple] = None) -> bool:
+        """
+        Publish one trip without waiting for the renderer.
+
+        Args:
+            planet: Planet the Morties were sent to
+            result: send_morties response
+            strategy: Strategy to snapshot (see strategy_snapshot)
+            snapshot: Precomputed snapshot (used instead of strategy)
+
+        Returns:
+            False if the dashboard is not running or the trip was dropped
+        """
+        if self._queue is None:
+            return False
+        if snapshot is None and strategy is not None:
+            snapshot = strategy_snapshot(strategy, result.get("steps_taken"))
+        message = (result.get("steps_taken", 0), planet, survivors(result),
+                   result.get("morties_sent", 0), snapshot)
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self, timeout: float = 5.0):
+        """Draw the last frame and stop the renderer."""
+        if self._process is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        # trips the renderer never read must not hold up the exit
+        self._queue.cancel_join_thread()
+        self._queue.close()
+        self._process = None
+        self._queue = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
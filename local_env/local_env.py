@@ -7,12 +7,15 @@ Chaque planète a une probabilité de survie déterminée par :
 
 t = numéro du voyage (global, pas par planète).
 Envoyer 1,2 ou 3 Mortys renvoie {survived_count}.
+
+Avec horizon=N, la courbe p(0..N) est précalculée (float32) à la construction :
+un voyage devient alors une lecture de table + un tirage.
 """
 
 import numpy as np
 
 class Planet:
-    def __init__(self, name, period, amplitude=0.25, offset=0.5, phase=None):
+    def __init__(self, name, period, amplitude=0.25, offset=0.5, phase=None, horizon=None):
         self.name = name
         self.period = period
         self.A = amplitude
@@ -20,10 +23,21 @@ class Planet:
         self.phase = phase if phase is not None else np.random.uniform(0, 2*np.pi)
         self.omega = 2*np.pi / period
 
+        # table[t] = p(t) pour t = 0..horizon
+        self.table = None
+        if horizon is not None:
+            self.table = self.survival_prob(np.arange(horizon + 1)).astype(np.float32)
+
     def survival_prob(self, t):
         p = self.C + self.A * np.cos(self.omega * t + self.phase)
         return np.clip(p, 0.0, 1.0)
 
+    def prob_at(self, t):
+        """p(t) via la table si t est dans l'horizon, sinon calcul direct."""
+        if self.table is not None and 0 <= t < len(self.table):
+            return float(self.table[t])
+        return float(self.survival_prob(t))
+
     def send_morties(self, t, n):
         """
         t = voyage ID (global)
@@ -31,17 +45,22 @@ class Planet:
         return number of survivors
         """
         assert n in [1,2,3]
-        p = self.survival_prob(t)
+        p = self.prob_at(t)
         return np.random.binomial(n, p)
 
 
 class LocalEnvironment:
-    def __init__(self):
+    def __init__(self, precompute=False, horizon=1000):
+        """
+        precompute=True : chaque planète matérialise sa table p(0..horizon)
+        (horizon = 1000 voyages max, soit 1000 Mortys envoyés un par un).
+        """
         self.t = 0
+        table_horizon = horizon if precompute else None
         self.planets = {
-            0: Planet("Potit Chat", 10),
-            1: Planet("Potit Chien", 20),
-            2: Planet("Potite Tortue", 200)
+            0: Planet("Potit Chat", 10, horizon=table_horizon),
+            1: Planet("Potit Chien", 20, horizon=table_horizon),
+            2: Planet("Potite Tortue", 200, horizon=table_horizon)
         }
 
     def send(self, planet_id, n):
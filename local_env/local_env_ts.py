@@ -34,3 +34,72 @@ class LocalMortyEnv:
 
         self.t += 1
         return surv, morty_count
+
+
+class BatchLocalMortyEnv:
+    """
+    Vectorized LocalMortyEnv: n_episodes independent episodes stepped in lockstep.
+    Each episode has its own random phases (self.phi has shape (n_episodes, 3))
+    and its own trip counter (self.t has shape (n_episodes,)).
+    """
+    def __init__(self, n_episodes, seed=None):
+        self.n_episodes = n_episodes
+        self.rng = np.random.default_rng(seed)
+
+        self.t = np.zeros(n_episodes, dtype=np.int64)
+
+        self.periods = np.array([10, 20, 200])
+        self.w = 2*np.pi/self.periods
+
+        # same amplitude and offset as LocalMortyEnv
+        self.A = np.array([0.20, 0.25, 0.15])
+        self.C = np.array([0.50, 0.55, 0.45])
+
+        # random phase for each episode and each planet
+        self.phi = self.rng.uniform(0, 2*np.pi, size=(n_episodes, 3))
+
+        self._rows = np.arange(n_episodes)
+
+    def true_rate(self, planets=None):
+        """
+        Return the true survival probs at current t.
+        With planets=None, shape (n_episodes, 3); otherwise the rate of
+        planets[i] in episode i, shape (n_episodes,).
+        """
+        if planets is None:
+            return self.A * np.cos(self.w * self.t[:, None] + self.phi) + self.C
+
+        planets = np.asarray(planets)
+        return (self.A[planets] * np.cos(self.w[planets]*self.t + self.phi[self._rows, planets])
+                + self.C[planets])
+
+    def send(self, planets, morty_count, active=None):
+        """
+        Send mortys in every episode at once.
+        planets: arm chosen per episode, shape (n_episodes,)
+        morty_count: scalar or shape (n_episodes,), allowed sizes = 1,2,3
+        active: optional bool mask; inactive episodes send nothing and keep their t.
+        Returns (successes, trials) as int arrays of shape (n_episodes,).
+        """
+        planets = np.asarray(planets, dtype=np.intp)
+        if planets.shape != (self.n_episodes,):
+            raise ValueError(f"Expected {self.n_episodes} arm choices, got shape {planets.shape}")
+        if np.any((planets < 0) | (planets > 2)):
+            raise ValueError("Planet must be 0, 1 or 2")
+
+        counts = np.broadcast_to(np.asarray(morty_count, dtype=np.int64), planets.shape)
+        if np.any((counts < 1) | (counts > 3)):
+            raise ValueError("Morty count must be 1, 2 or 3")
+
+        p = self.true_rate(planets)
+        surv = self.rng.binomial(counts, p)
+
+        if active is None:
+            self.t += 1
+            return surv, counts.copy()
+
+        active = np.asarray(active, dtype=bool)
+        surv = np.where(active, surv, 0)
+        trials = np.where(active, counts, 0)
+        self.t += active
+        return surv, trials
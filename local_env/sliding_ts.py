@@ -4,7 +4,8 @@ from collections import deque
 class SlidingWindowTS:
     """
     Thompson sampling with sliding window of last k observations.
-    Each arm maintains a deque of (success, failure) pairs.
+    Each arm maintains a deque of (success, failure) pairs, plus running
+    success/failure sums over its window so select_arm is O(arms).
     """
     def __init__(self, n_arms, window=200, prior_a=1, prior_b=1):
         self.n = n_arms
@@ -15,18 +16,26 @@ class SlidingWindowTS:
         # For each arm, store last observations
         self.buffers = [deque(maxlen=self.window) for _ in range(self.n)]
 
-    def select_arm(self):
-        """Sample from Beta posterior of each arm."""
-        samples = []
-        for i in range(self.n):
-            successes = sum([s for (s,f) in self.buffers[i]])
-            failures  = sum([f for (s,f) in self.buffers[i]])
-            alpha = self.prior_a + successes
-            beta  = self.prior_b + failures
-            samples.append(np.random.beta(alpha, beta))
+        # Running sums of each arm's window
+        self.successes = np.zeros(self.n)
+        self.failures = np.zeros(self.n)
 
+    def select_arm(self):
+        """Sample from Beta posterior of each arm (one vectorized draw)."""
+        samples = np.random.beta(self.prior_a + self.successes,
+                                 self.prior_b + self.failures)
         return np.argmax(samples)
 
     def update(self, arm, successes, trials):
         failures = trials - successes
-        self.buffers[arm].append((successes, failures))
+        buf = self.buffers[arm]
+
+        # the deque is about to evict its oldest observation
+        if len(buf) == self.window:
+            old_s, old_f = buf[0]
+            self.successes[arm] -= old_s
+            self.failures[arm] -= old_f
+
+        buf.append((successes, failures))
+        self.successes[arm] += successes
+        self.failures[arm] += failures
@@ -0,0 +1,307 @@
+"""
+Local stand-in for the Sphinx portal API.
+
+Implements /api/mortys/start/, /api/mortys/portal/ and /api/mortys/status/
+with the same JSON schema as https://challenge.sphinxhq.com, backed by the
+sinusoidal planets of local_env (one episode per token). Latency and error
+injection make it usable to load-test the clients and strategies offline.
+
+Run it and point the clients at it:
+
+    python local_server.py --latency 0.05 --error-rate 0.1
+    SPHINX_BASE_URL=http://127.0.0.1:8000 python main_strat_seconde.py
+
+or in-process:
+
+    server, base_url = start_server(port=0)
+    client = SphinxAPIClient("local-token", base_url=base_url)
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from evaluate_strategy import LocalClient
+from local_env.local_env_ts import LocalMortyEnv
+
+
+class MortyPortalApp:
+    """
+    Request dispatcher of the local API, independent of the HTTP server.
+
+    handle() takes (method, path, headers, payload) and returns
+    (status_code, response_headers, body_dict).
+    """
+
+    def __init__(
+        self,
+        tokens: Optional[Iterable[str]] = None,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        retry_after: float = 1.0,
+        env_factory: Callable = LocalMortyEnv,
+        total_morties: int = 1000,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize the app.
+
+        Args:
+            tokens: Accepted API tokens (None = accept any bearer token)
+            latency: Seconds slept before answering each request
+            error_rate: Probability of answering error_status instead of
+                        processing the request (the request has no effect)
+            error_status: Status code of injected errors (429 adds Retry-After)
+            retry_after: Retry-After value of injected 429/503 errors, in seconds
+            env_factory: Environment factory of each episode
+            total_morties: Number of Morties in the Citadel per episode
+            seed: Seed of the error injection
+        """
+        self.tokens = set(tokens) if tokens is not None else None
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.env_factory = env_factory
+        self.total_morties = total_morties
+
+        self.rng = random.Random(seed)
+        self.episodes: Dict[str, LocalClient] = {}
+        self.lock = threading.Lock()
+        self.request_count = 0
+
+    def _token(self, headers: Dict) -> Optional[str]:
+        auth = headers.get("Authorization") or headers.get("authorization") or ""
+        if not auth.startswith("Bearer "):
+            return None
+        token = auth[len("Bearer "):].strip()
+        if not token or (self.tokens is not None and token not in self.tokens):
+            return None
+        return token
+
+    def _episode(self, token: str) -> LocalClient:
+        if token not in self.episodes:
+            self.episodes[token] = LocalClient(self.env_factory, self.total_morties)
+        return self.episodes[token]
+
+    def handle(self, method: str, path: str, headers: Dict,
+               payload: Optional[Dict] = None) -> Tuple[int, Dict, Dict]:
+        """
+        Sleep for the injected latency, then dispatch one request.
+
+        Args:
+            method: HTTP method
+            path: Request path (query string ignored)
+            headers: Request headers
+            payload: Decoded JSON body, if any
+
+        Returns:
+            Tuple of (status_code, response_headers, body)
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        return self.dispatch(method, path, headers, payload)
+
+    def dispatch(self, method: str, path: str, headers: Dict,
+                 payload: Optional[Dict] = None) -> Tuple[int, Dict, Dict]:
+        """Dispatch one request without the injected latency (see handle)."""
+        path = urlsplit(path).path
+        if not path.endswith("/"):
+            path += "/"
+
+        with self.lock:
+            self.request_count += 1
+
+            if path == "/api/auth/request-token/" and method == "POST":
+                return 200, {}, {"message": "Local server: any token is accepted"}
+
+            token = self._token(headers)
+            if token is None:
+                return 401, {}, {"detail": "Invalid or missing API token"}
+
+            if self.error_rate and self.rng.random() < self.error_rate:
+                extra = {}
+                if self.error_status in (429, 503):
+                    extra["Retry-After"] = f"{self.retry_after:g}"
+                return self.error_status, extra, {"detail": "Injected error"}
+
+            if path == "/api/mortys/start/" and method == "POST":
+                client = self._episode(token)
+                status = client.start_episode()
+                status["status_message"] = "Episode started"
+                return 200, {}, status
+
+            if path == "/api/mortys/status/" and method == "GET":
+                return 200, {}, self._episode(token).get_status()
+
+            if path == "/api/mortys/portal/" and method == "POST":
+                payload = payload or {}
+                try:
+                    planet = int(payload.get("planet"))
+                    morty_count = int(payload.get("morty_count"))
+                    return 200, {}, self._episode(token).send_morties(planet, morty_count)
+                except (TypeError, ValueError) as e:
+                    return 400, {}, {"detail": str(e) or "Invalid payload"}
+
+        return 404, {}, {"detail": "Not found"}
+
+
+class _PortalRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    disable_nagle_algorithm = True  # headers and body are written separately
+    app: MortyPortalApp = None
+
+    def _dispatch(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = None
+        if length:
+            try:
+                payload = json.loads(self.rfile.read(length))
+            except ValueError:
+                payload = None
+
+        status, headers, body = self.app.handle(method, self.path, dict(self.headers), payload)
+        data = json.dumps(body).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8000,
+                app: Optional[MortyPortalApp] = None, **app_kwargs) -> ThreadingHTTPServer:
+    """
+    Create (but don't start) a threaded HTTP server for the local API.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 = any free port)
+        app: App to serve (default: MortyPortalApp(**app_kwargs))
+        **app_kwargs: Forwarded to MortyPortalApp
+
+    Returns:
+        ThreadingHTTPServer; its .app attribute is the served app
+    """
+    app = app or MortyPortalApp(**app_kwargs)
+    handler = type("PortalRequestHandler", (_PortalRequestHandler,), {"app": app})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.app = app
+    return server
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0,
+                 **app_kwargs) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start the local API in a background thread.
+
+    Returns:
+        Tuple of (server, base_url). Call server.shutdown() to stop it.
+    """
+    server = make_server(host, port, **app_kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+class LocalTransport:
+    """
+    In-process transport for AsyncSphinxAPIClient calling a MortyPortalApp
+    directly, without sockets. The app's latency is awaited, so concurrent
+    requests overlap as they would over the network.
+    """
+
+    def __init__(self, app: MortyPortalApp):
+        self.app = app
+
+    async def request(self, method: str, url: str, headers: Optional[Dict] = None,
+                      json: Optional[Dict] = None) -> Dict:
+        if self.app.latency:
+            await asyncio.sleep(self.app.latency)
+        status, response_headers, body = self.app.dispatch(method, url, headers or {}, json)
+        if status >= 400:
+            response = requests.Response()
+            response.status_code = status
+            response.headers.update(response_headers)
+            response.url = url
+            response._content = str(body).encode()
+            response.raise_for_status()
+        return body
+
+    async def close(self):
+        pass
+
+
+HOST = "127.0.0.1"
+PORT = 8000
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Command-line options of the server. Each defaults to a LOCAL_SERVER_*
+    environment variable, e.g. LOCAL_SERVER_LATENCY=0.05.
+    """
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description="Local stand-in for the Sphinx portal API")
+    parser.add_argument("--host", default=env("LOCAL_SERVER_HOST", HOST))
+    parser.add_argument("--port", type=int, default=int(env("LOCAL_SERVER_PORT", PORT)))
+    parser.add_argument("--latency", type=float, default=float(env("LOCAL_SERVER_LATENCY", 0.0)),
+                        help="seconds slept before answering each request")
+    parser.add_argument("--error-rate", type=float, default=float(env("LOCAL_SERVER_ERROR_RATE", 0.0)),
+                        help="probability of answering an injected error")
+    parser.add_argument("--error-status", type=int, default=int(env("LOCAL_SERVER_ERROR_STATUS", 503)),
+                        help="status code of injected errors")
+    parser.add_argument("--retry-after", type=float, default=float(env("LOCAL_SERVER_RETRY_AFTER", 1.0)),
+                        help="Retry-After of injected 429/503 errors, in seconds")
+    parser.add_argument("--seed", type=int, default=env("LOCAL_SERVER_SEED"),
+                        help="seed of the error injection")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    server = make_server(
+        args.host, args.port, latency=args.latency, error_rate=args.error_rate,
+        error_status=args.error_status, retry_after=args.retry_after,
+        seed=None if args.seed is None else int(args.seed)
+    )
+    host, port = server.server_address[:2]
+    print("=== LOCAL SPHINX PORTAL SERVER ===")
+    print(f"Listening on http://{host}:{port}")
+    if args.latency or args.error_rate:
+        print(f"Latency {args.latency:g}s, error rate {args.error_rate:g} (status {args.error_status})")
+    print(f"Use it with: SPHINX_BASE_URL=http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping server")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
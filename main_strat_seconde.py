@@ -1,7 +1,7 @@
 # main_changeaware.py
-import pandas as pd
 from api_client import SphinxAPIClient
 from data_collector import DataCollector
+from trip_buffer import TripBuffer
 from visualizations import (
     plot_survival_rates,
     plot_survival_by_planet,
@@ -11,6 +11,25 @@ from visualizations import (
 )
 
 from strat_second import ChangeAwareStickyTS
+from live_dashboard import LiveDashboard
+from utils import survivors
+
+# Tune these offline with tune_strategy.py (tune_strategy.best_params())
+STRATEGY_PARAMS = dict(
+    n_arms=3,
+    prior_a=1, prior_b=1,
+    epsilon_probe=0.05,
+    min_stick=2,
+    switch_margin=0.05,
+    buffer_size=25,
+    cusum_h=4.0,
+    cusum_k=0.015,
+    forced_explore_after_reset=8,
+    partial_reset=False
+)
+
+# Show the episode live (see live_dashboard.py); publishing never blocks the loop
+LIVE_DASHBOARD = False
 
 def main():
     try:
@@ -23,29 +42,12 @@ def main():
 
         client.start_episode()
 
-        window_buf = 40
-        cusum_h = 8.0
-        cusum_k = 0.02
-        forced_explore_after_reset = 6
-        partial_reset = True
-
-        strategy = ChangeAwareStickyTS(
-            n_arms=3,
-            prior_a=1, prior_b=1,
-            epsilon_probe=0.05,
-            min_stick=2,
-            switch_margin=0.05,
-            buffer_size=25,
-            cusum_h=4.0,
-            cusum_k=0.015,
-            forced_explore_after_reset=8,
-            partial_reset=False
-
-        )
+        strategy = ChangeAwareStickyTS(**STRATEGY_PARAMS)
 
         total_morties_sent = 0
         morties_per_batch = 3
-        all_data = []
+        trips = TripBuffer()
+        dashboard = LiveDashboard().start() if LIVE_DASHBOARD else None
 
         # send until 1000 morties or until API limit stops us
         while total_morties_sent < 1000:
@@ -54,26 +56,17 @@ def main():
             try:
                 result = client.send_morties(arm, morties_per_batch)
 
-                trip_data = {
-                    'planet': arm,
-                    'planet_name': client.get_planet_name(arm),
-                    'morties_sent': result['morties_sent'],
-                    'survived': result['survived'],  # boolean if all survived
-                    'steps_taken': result['steps_taken'],
-                    'morties_in_citadel': result['morties_in_citadel'],
-                    'morties_on_planet_jessica': result['morties_on_planet_jessica'],
-                    'morties_lost': result['morties_lost']
-                }
-
-                all_data.append(trip_data)
-
-                # Pour SphinxAPI, "survived" = nombre de mortys vivants dans CE batch
-                successes = result.get("survived", 0)
+                trips.append_result(arm, result, trip_number=len(trips) + 1)
+
+                # Nombre de mortys vivants dans CE batch ("survived" est un booléen)
+                successes = survivors(result)
                 trials = result.get("morties_sent", morties_per_batch)
 
 
                 # Update the strategy
                 strategy.observe(arm, successes, trials)
+                if dashboard is not None:
+                    dashboard.publish(arm, result, strategy)
 
                 total_morties_sent += morties_per_batch
 
@@ -85,7 +78,10 @@ def main():
                 print(f"Error sending Morties: {e}")
                 break
 
-        df = pd.DataFrame(all_data)
+        if dashboard is not None:
+            dashboard.close()
+
+        df = trips.to_dataframe()
 
         print("\n" + "="*60)
         print("FINAL STATISTICS")
@@ -109,7 +105,7 @@ def main():
         print("\nOverall Survival Rate (by Morties): {:.2f}%".format(overall_survival_pct))
 
         # Save & visualize
-        collector.trips_data = all_data
+        collector.trips_data = trips
         collector.save_data("morties_changeaware_strategy.csv")
 
         print("\nGenerating plots...")
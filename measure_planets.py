@@ -1,38 +1,79 @@
 # measure_planets.py
+"""
+Measurement campaign: RUNS_PER_PLANET episodes of TRIPS_PER_RUN trips on
+each planet, appended to CSV_FILE.
+
+Runs are sharded across workers, one per API token (SPHINX_API_TOKENS,
+comma-separated, or SPHINX_API_TOKEN), each reusing a single client. Rows
+are written as trips complete and committed when their run ends; the
+checkpoint of the CSV (see trip_store.BufferedCSVWriter) is the campaign
+manifest of completed (planet, run) pairs, so a restarted campaign skips
+them. Runs of concurrent workers interleave in the file, so the checkpoint
+also lists the runs with rows written but not complete: their rows are
+dropped when such a run fails, or on resume after a crash.
+With SPHINX_BASE_URL pointing at local_server.py any tokens work, e.g.
+SPHINX_API_TOKENS=a,b,c,d.
+"""
 import os
-import csv
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
 from api_client import SphinxAPIClient
+from trip_store import BufferedCSVWriter
 
 
 CSV_FILE = "planet_measurements.csv"
+PLANETS = [0, 1, 2]
 RUNS_PER_PLANET = 5
 TRIPS_PER_RUN = 1000
 MORTIES_PER_TRIP = 3
 
-
-def append_row(row):
-    file_exists = os.path.isfile(CSV_FILE)
-    with open(CSV_FILE, "a", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=row.keys())
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(row)
-
-
-def do_single_run(planet, run_id):
-    print(f"\n=== RUN planet {planet}, run {run_id} ===")
-
-    client = SphinxAPIClient()
-    client.start_episode()
-
-    for trip in range(1, TRIPS_PER_RUN + 1):
-        try:
-            res = client.send_morties(planet, MORTIES_PER_TRIP)
-        except Exception as e:
-            print("API error:", e)
+FIELDNAMES = [
+    "planet",
+    "run",
+    "trip_index",
+    "survived",
+    "morties_sent",
+    "morties_lost",
+    "morties_in_citadel",
+    "morties_on_planet_jessica",
+    "steps_taken"
+]
+
+
+def campaign_tokens() -> List[str]:
+    """API tokens of the workers: SPHINX_API_TOKENS, else SPHINX_API_TOKEN."""
+    load_dotenv()
+    tokens = [t.strip() for t in os.getenv("SPHINX_API_TOKENS", "").split(",") if t.strip()]
+    if not tokens and os.getenv("SPHINX_API_TOKEN"):
+        tokens = [os.getenv("SPHINX_API_TOKEN")]
+    return tokens
+
+
+def do_single_run(client, planet, run_id, trips_per_run=TRIPS_PER_RUN,
+                  morties_per_trip=MORTIES_PER_TRIP) -> Iterator[Dict]:
+    """
+    Measure one episode on a planet.
+
+    The run ends after trips_per_run trips or when the Citadel is empty
+    (after ceil(1000 / morties_per_trip) trips), whichever comes first.
+
+    Yields:
+        One row per trip, as soon as it completes. API errors (after the
+        client's retries) propagate mid-run.
+    """
+    morties_left = client.start_episode()["morties_in_citadel"]
+
+    for trip in range(1, trips_per_run + 1):
+        if morties_left <= 0:
             break
-
-        row = {
+        res = client.send_morties(planet, min(morties_per_trip, morties_left))
+        morties_left = res["morties_in_citadel"]
+        yield {
             "planet": planet,
             "run": run_id,
             "trip_index": trip,
@@ -43,23 +84,135 @@ def do_single_run(planet, run_id):
             "morties_on_planet_jessica": res["morties_on_planet_jessica"],
             "steps_taken": res["steps_taken"]
         }
-        append_row(row)
 
-        if trip % 100 == 0:
-            print(f"  progress: {trip}/{TRIPS_PER_RUN}")
 
-    print("Run completed.")
+def run_campaign(tokens: List[str], base_url: Optional[str] = None, csv_file: str = CSV_FILE,
+                 planets=PLANETS, runs_per_planet: int = RUNS_PER_PLANET,
+                 trips_per_run: int = TRIPS_PER_RUN,
+                 morties_per_trip: int = MORTIES_PER_TRIP) -> Dict:
+    """
+    Run (or resume) a measurement campaign.
+
+    Args:
+        tokens: One API token per worker (the server keeps one episode per token)
+        base_url: Server URL (see SphinxAPIClient)
+        csv_file: CSV to append to; its checkpoint holds the completed runs
+        planets: Planets to measure
+        runs_per_planet: Episodes per planet
+        trips_per_run: Trips per episode
+        morties_per_trip: Morties per trip (1-3)
+
+    Returns:
+        Dict with runs, failed, skipped, trips, seconds and trips_per_sec
+    """
+    if not tokens:
+        raise ValueError("At least one API token is required")
+
+    clients = queue.Queue()
+    for token in tokens:
+        clients.put(SphinxAPIClient(token, base_url=base_url))
+
+    # (kind, planet, run_id, row or error), from the workers to the main thread
+    events = queue.Queue()
+
+    def measure(planet, run_id):
+        client = clients.get()
+        try:
+            for row in do_single_run(client, planet, run_id, trips_per_run, morties_per_trip):
+                events.put(("row", planet, run_id, row))
+            events.put(("done", planet, run_id, None))
+        except Exception as e:
+            events.put(("failed", planet, run_id, e))
+        finally:
+            clients.put(client)
+
+    stats = {"runs": 0, "failed": 0, "skipped": 0, "trips": 0}
+    start = time.perf_counter()
+
+    try:
+        with BufferedCSVWriter(csv_file, FIELDNAMES) as writer:
+            completed = [tuple(pr) for pr in writer.state.get("completed", [])]
+            # runs with rows written but not complete: in flight, or failed
+            partial = {tuple(pr) for pr in writer.state.get("partial", [])}
+
+            def drop_partial_runs():
+                writer.filter_rows(lambda row: (int(row["planet"]), int(row["run"])) not in partial,
+                                   {"completed": completed, "partial": []})
+                partial.clear()
+
+            if partial:
+                print(f"Dropping the rows of {len(partial)} unfinished runs")
+                drop_partial_runs()
+
+            todo = [(p, r) for p in planets for r in range(runs_per_planet) if (p, r) not in completed]
+            stats["skipped"] = len(completed)
+            if completed:
+                print(f"Resuming: {len(completed)} runs already recorded, {len(todo)} to go")
+
+            trips = {}
+            with ThreadPoolExecutor(max_workers=len(tokens)) as executor:
+                for p, r in todo:
+                    executor.submit(measure, p, r)
+
+                finished = 0
+                while finished < len(todo):
+                    # rows are only written here, from the main thread
+                    kind, planet, run_id, value = events.get()
+                    run = (planet, run_id)
+
+                    if kind == "row":
+                        writer.writerow(value)
+                        partial.add(run)
+                        trips[run] = value["trip_index"]
+                        if value["trip_index"] % 100 == 0:
+                            print(f"  planet {planet}, run {run_id}: {value['trip_index']}/{trips_per_run} trips")
+                        continue
+
+                    finished += 1
+                    if kind == "failed":
+                        stats["failed"] += 1
+                        print(f"  planet {planet}, run {run_id}: API error: {value}")
+                        continue
+
+                    completed.append(run)
+                    partial.discard(run)
+                    # rows of the runs still in flight are committed too, and
+                    # listed in partial so a resume drops them
+                    writer.commit({"completed": completed, "partial": sorted(partial)})
+
+                    stats["runs"] += 1
+                    stats["trips"] += trips.get(run, 0)
+                    elapsed = time.perf_counter() - start
+                    print(f"  planet {planet}, run {run_id} done "
+                          f"({stats['runs']}/{len(todo)} runs, {stats['trips'] / elapsed:.1f} trips/s)")
+
+            # every run has ended: only failed runs are left in partial
+            if partial:
+                drop_partial_runs()
+    finally:
+        while not clients.empty():
+            clients.get().close()
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["trips_per_sec"] = stats["trips"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
 
 
 def main():
     print("=== PLANET MEASUREMENT SCRIPT ===")
     print(f"Data will be appended to {CSV_FILE}")
 
-    for planet in [0, 1, 2]:
-        for r in range(RUNS_PER_PLANET):
-            do_single_run(planet, run_id=r)
+    tokens = campaign_tokens()
+    print(f"{len(tokens)} worker(s)")
+
+    stats = run_campaign(tokens)
 
-    print("\nAll runs complete. Data saved.")
+    print(f"\n{stats['runs']} runs, {stats['trips']} trips in {stats['seconds']:.1f}s "
+          f"({stats['trips_per_sec']:.1f} trips/s)")
+    if stats["failed"]:
+        print(f"{stats['failed']} runs failed; run the script again to retry them.")
+    else:
+        print("All runs complete. Data saved.")
 
 
 if __name__ == "__main__":
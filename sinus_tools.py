@@ -0,0 +1,247 @@
+# sinus_tools.py
+"""
+Sinusoid fitting for the planet survival curves.
+
+With a known angular frequency w, p(t) = c0 + A*cos(w*t + phi) is linear in
+(c0, a, b):
+
+    p(t) = c0 + a*cos(w*t) + b*sin(w*t),   A = hypot(a, b),  phi = atan2(-b, a)
+
+so a fit is a 3x3 least-squares problem. Here the normal equations of many
+series (runs, planets) and many candidate frequencies are built together
+over a shared time grid (with FFTs on the default frequency grid) and
+solved in closed form as one stacked batch; missing observations are
+masked out. Scanning the candidate frequencies gives a floating-mean
+Lomb-Scargle periodogram, whose peak is the fitted frequency.
+
+    fit = fit_sinusoidal_model(t, y)              # one series, frequency scan
+    fits = fit_sinusoids(t, Y, periods=PERIODS)   # Y of shape (runs, T)
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+# Planet periods of the challenge (see local_env)
+PERIODS = (10, 20, 200)
+
+
+@dataclass
+class SinusFit:
+    """
+    Fit of c0 + amplitude*cos(w*t + phase).
+
+    Fields are floats for one series, or arrays of shape (R,) for a batch.
+    The *_err fields are standard errors from the least-squares covariance.
+    """
+    w: np.ndarray
+    amplitude: np.ndarray
+    phase: np.ndarray
+    c0: np.ndarray
+    a: np.ndarray
+    b: np.ndarray
+    amplitude_err: np.ndarray
+    phase_err: np.ndarray
+    c0_err: np.ndarray
+    power: np.ndarray          # fraction of the variance explained
+    n: np.ndarray              # number of observations used
+
+    @property
+    def period(self):
+        return 2 * np.pi / self.w
+
+    def predict(self, t):
+        """Fitted curve at times t (broadcast against a batch of fits)."""
+        return self.c0 + self.amplitude * np.cos(self.w * np.asarray(t) + self.phase)
+
+
+def candidate_frequencies(n_samples: int, oversample: int = 5, min_period: float = 2.0,
+                          max_period: Optional[float] = None, dt: float = 1.0) -> np.ndarray:
+    """
+    Angular frequencies to scan for n_samples points spaced by dt: the
+    frequency grid of an FFT zero-padded to oversample * n_samples, limited
+    to periods in [min_period, max_period] (default max: the series length).
+    The Nyquist frequency is left out: sin(w*t) vanishes on every sample
+    there, so the fit is singular. On this grid the scan runs as FFTs
+    instead of one fit per frequency.
+    """
+    n_fft = oversample * n_samples
+    max_period = max_period or n_samples * dt
+    k = np.arange(1, (n_fft + 1) // 2)
+    periods = n_fft * dt / k
+    k = k[(periods >= min_period) & (periods <= max_period)]
+    return 2 * np.pi * k / (n_fft * dt)
+
+
+def _as_batch(t, y, mask):
+    t = np.asarray(t, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if t.ndim != 1:
+        raise ValueError("t must be a 1-D time grid shared by every series")
+    y = np.atleast_2d(y)
+    if y.shape[1] != t.shape[0]:
+        raise ValueError(f"y has {y.shape[1]} samples per series, t has {t.shape[0]}")
+
+    m = np.isfinite(y)
+    if mask is not None:
+        m &= np.atleast_2d(np.asarray(mask, dtype=bool))
+    return t, np.where(m, y, 0.0), m.astype(float)
+
+
+def _fourier_sums(t, x, w):
+    """
+    sum_t x[r, t] * exp(i*w*t) for every row of x, at w and at 2w.
+
+    Uses FFTs when t is evenly spaced and w lies on its FFT grid (see
+    candidate_frequencies), a complex matrix product otherwise.
+    """
+    T = len(t)
+    if T > 1 and len(w) > 32 and w[1] > w[0]:
+        dt = (t[-1] - t[0]) / (T - 1)
+        n_fft = int(np.rint(2 * np.pi / ((w[1] - w[0]) * dt))) if dt > 0 else 0
+        k = w * n_fft * dt / (2 * np.pi)
+        if (T <= n_fft <= 64 * T and np.allclose(np.diff(t), dt)
+                and np.allclose(k, np.rint(k), atol=1e-6)):
+            k = np.rint(k).astype(int)
+            spectrum = np.conj(np.fft.fft(x, n=n_fft, axis=1))
+            shift = np.exp(1j * w * t[0])
+            return spectrum[:, k] * shift, spectrum[:, (2 * k) % n_fft] * shift ** 2
+
+    e = np.exp(1j * np.outer(t, w))           # (T, K)
+    return x @ e, x @ (e * e)
+
+
+def _solve(t, y, m, w):
+    """
+    Weighted least squares of every series (R) at every frequency (K).
+
+    Returns (beta, cov, rss, tss, n): beta (R, K, 3) holds (c0, a, b) and
+    cov (R, K, 3, 3) its covariance; singular fits are NaN.
+    """
+    R = len(y)
+    my = m * y
+    n = m.sum(axis=1)                         # (R,)
+    sy = my.sum(axis=1)
+    syy = (my * y).sum(axis=1)
+
+    z1, z2 = _fourier_sums(t, np.vstack([m, my]), w)
+    zm, zy, z2 = z1[:R], z1[R:], z2[:R]
+
+    # normal equations X'X = [[n, sc, ss], [sc, scc, scs], [ss, scs, sss]], each (R, K)
+    nn = np.broadcast_to(n[:, None], zm.shape)
+    sc, ss = zm.real, zm.imag
+    scc, sss, scs = (nn + z2.real) / 2, (nn - z2.real) / 2, z2.imag / 2
+    xty = np.stack([np.broadcast_to(sy[:, None], zm.shape), zy.real, zy.imag], axis=-1)
+
+    # closed-form inverse of the symmetric 3x3 matrices
+    i00, i01, i02 = scc * sss - scs ** 2, ss * scs - sc * sss, sc * scs - ss * scc
+    i11, i12, i22 = nn * sss - ss ** 2, sc * ss - nn * scs, nn * scc - sc ** 2
+    det = nn * i00 + sc * i01 + ss * i02
+    singular = (det <= 1e-9 * nn * np.maximum(scc * sss, 1e-300)) | (nn < 4)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        inv = np.stack([i00, i01, i02, i01, i11, i12, i02, i12, i22], axis=-1) / det[..., None]
+    inv[singular] = np.nan
+    inv = inv.reshape(*zm.shape, 3, 3)
+
+    beta = np.einsum("rkij,rkj->rki", inv, xty)
+    rss = np.maximum(syy[:, None] - np.einsum("rki,rki->rk", beta, xty), 0.0)
+    tss = syy - sy ** 2 / np.maximum(n, 1)
+    dof = np.maximum(n - 3, 1)
+    cov = inv * (rss / dof[:, None])[..., None, None]
+    return beta, cov, rss, tss, n
+
+
+def periodogram(t, y, w: Optional[Sequence[float]] = None, mask=None) -> np.ndarray:
+    """
+    Floating-mean Lomb-Scargle periodogram.
+
+    Args:
+        t: Time grid, shape (T,)
+        y: Series, shape (T,) or (R, T); NaN marks a missing observation
+        w: Angular frequencies (default: candidate_frequencies(T))
+        mask: Optional bool array like y, True where y is observed
+
+    Returns:
+        Fraction of the variance explained by each frequency, shape (K,) for
+        one series or (R, K). Frequencies where the fit is singular (e.g. too
+        few observations) get 0, so argmax never picks them.
+    """
+    single = np.ndim(y) == 1
+    t, y, m = _as_batch(t, y, mask)
+    w = candidate_frequencies(len(t)) if w is None else np.atleast_1d(np.asarray(w, dtype=float))
+
+    _, _, rss, tss, _ = _solve(t, y, m, w)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        power = np.where(tss[:, None] > 0, 1 - rss / tss[:, None], 0.0)
+    power = np.where(np.isfinite(power), power, 0.0)
+    return power[0] if single else power
+
+
+def fit_sinusoids(t, y, w: Optional[Sequence[float]] = None,
+                  periods: Optional[Sequence[float]] = None, mask=None) -> SinusFit:
+    """
+    Fit every series at once, each at its best frequency among the candidates.
+
+    Args:
+        t: Time grid, shape (T,)
+        y: Series, shape (T,) or (R, T); NaN marks a missing observation
+        w: Candidate angular frequencies
+        periods: Candidate periods (used when w is None); with neither,
+                 the frequencies of candidate_frequencies(T) are scanned
+        mask: Optional bool array like y, True where y is observed
+
+    Returns:
+        SinusFit with fields of shape (R,). Series with fewer than 4
+        observations get NaN parameters.
+    """
+    t, y, m = _as_batch(t, y, mask)
+    if w is None:
+        w = 2 * np.pi / np.asarray(periods, dtype=float) if periods is not None else candidate_frequencies(len(t))
+    w = np.atleast_1d(np.asarray(w, dtype=float))
+
+    beta, cov, rss, tss, n = _solve(t, y, m, w)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        power = np.where(tss[:, None] > 0, 1 - rss / tss[:, None], 0.0)
+
+    rows = np.arange(len(y))
+    best = np.nanargmax(np.where(np.isfinite(power), power, -np.inf), axis=1)
+    beta, cov, power = beta[rows, best], cov[rows, best], power[rows, best]
+
+    c0, a, b = beta[:, 0], beta[:, 1], beta[:, 2]
+    var_c0, var_a, var_b, cov_ab = cov[:, 0, 0], cov[:, 1, 1], cov[:, 2, 2], cov[:, 1, 2]
+    amplitude = np.hypot(a, b)
+    a2 = np.maximum(amplitude ** 2, 1e-300)
+
+    # delta method through A = hypot(a, b) and phi = atan2(-b, a)
+    amplitude_err = np.sqrt(np.maximum(a * a * var_a + 2 * a * b * cov_ab + b * b * var_b, 0) / a2)
+    phase_err = np.sqrt(np.maximum(b * b * var_a - 2 * a * b * cov_ab + a * a * var_b, 0)) / a2
+
+    return SinusFit(
+        w=w[best], amplitude=amplitude, phase=np.arctan2(-b, a), c0=c0, a=a, b=b,
+        amplitude_err=amplitude_err, phase_err=phase_err, c0_err=np.sqrt(var_c0),
+        power=power, n=n
+    )
+
+
+def fit_sinusoidal_model(t, y, w: Optional[float] = None,
+                         periods: Optional[Sequence[float]] = None) -> Optional[SinusFit]:
+    """
+    Fit c0 + A*cos(w*t + phi) to one series.
+
+    Args:
+        t: Times, shape (T,)
+        y: Observations, shape (T,); NaN values are ignored
+        w: Known angular frequency (default: scan periods, or the whole
+           candidate_frequencies grid)
+        periods: Candidate periods
+
+    Returns:
+        SinusFit with float fields, or None if the fit failed (fewer than 4
+        observations)
+    """
+    fit = fit_sinusoids(t, y, w=None if w is None else [w], periods=periods)
+    if not (np.isfinite(fit.c0[0]) and np.isfinite(fit.amplitude[0])) or fit.n[0] < 4:
+        return None
+    return SinusFit(**{name: float(value[0]) for name, value in vars(fit).items()})
@@ -1,11 +1,17 @@
 import numpy as np
-from collections import deque
 import random
 
 def safe_positive(x, floor=1e-6):
     return max(x, floor)
 
 class ArmStats:
+    __slots__ = (
+        "prior_a", "prior_b", "alpha", "beta",
+        "G_pos", "G_neg", "h", "k",
+        "buffer_size", "_ring", "_head", "_count", "_sum",
+        "forced_explore", "forced_explore_after_reset",
+    )
+
     def __init__(self, prior_a=1.0, prior_b=1.0, cusum_h=6.0, cusum_k=0.02, buffer_size=40, forced_explore_after_reset=6):
         self.prior_a = prior_a
         self.prior_b = prior_b
@@ -17,12 +23,42 @@ class ArmStats:
         self.G_neg = 0.0
         self.h = cusum_h
         self.k = cusum_k
-        self.buffer = deque(maxlen=buffer_size)
+
+        # ring buffer of the last buffer_size proportions, with a running sum
+        self.buffer_size = buffer_size
+        self._ring = [0.0] * buffer_size
+        self._head = 0
+        self._count = 0
+        self._sum = 0.0
 
         # forced exploration after reset
         self.forced_explore = 0
         self.forced_explore_after_reset = forced_explore_after_reset
 
+    @property
+    def buffer(self):
+        """Buffered proportions, oldest first."""
+        if self._count < self.buffer_size:
+            return self._ring[:self._count]
+        return self._ring[self._head:] + self._ring[:self._head]
+
+    def _push(self, p_obs):
+        if not self.buffer_size:
+            # an empty buffer keeps nothing (and CUSUM never triggers)
+            return
+        if self._count == self.buffer_size:
+            self._sum -= self._ring[self._head]
+        else:
+            self._count += 1
+        self._ring[self._head] = p_obs
+        self._sum += p_obs
+
+        self._head += 1
+        if self._head == self.buffer_size:
+            self._head = 0
+            # resync the running sum once per lap to avoid float drift
+            self._sum = sum(self._ring[:self._count])
+
     def sample_theta(self):
         # ensure alpha/beta > 0
         a = safe_positive(self.alpha)
@@ -44,12 +80,13 @@ class ArmStats:
         self.beta += (t - s)
         # update buffer with proportion
         p_obs = s / t
-        self.buffer.append(p_obs)
+        self._push(p_obs)
 
     def check_and_update_cusum(self, latest_proportion):
-        if len(self.buffer) < 2:
+        if self._count < 2:
             return False
-        ref_mean = np.mean(list(self.buffer)[:-1])
+        # mean of the buffer without its latest entry
+        ref_mean = (self._sum - self._ring[self._head - 1]) / (self._count - 1)
         s_pos = latest_proportion - ref_mean - self.k
         self.G_pos = max(0.0, self.G_pos + s_pos)
         s_neg = ref_mean - latest_proportion - self.k
@@ -68,7 +105,9 @@ class ArmStats:
         else:
             self.alpha = self.prior_a
             self.beta = self.prior_b
-        self.buffer.clear()
+        self._head = 0
+        self._count = 0
+        self._sum = 0.0
         self.G_pos = 0.0
         self.G_neg = 0.0
         self.forced_explore = self.forced_explore_after_reset
@@ -163,3 +202,278 @@ class ChangeAwareStickyTS:
             else:
                 self.current_arm = arm_index
                 self.current_arm_streak = 1
+
+
+class ArrayChangeAwareStickyTS:
+    """
+    Struct-of-arrays version of ChangeAwareStickyTS.
+    Same parameters and same decisions, but alpha/beta/G_pos/G_neg, the
+    forced-exploration counters and the proportion ring buffers of all arms
+    live in NumPy arrays instead of one ArmStats object per arm.
+    """
+
+    def __init__(self, n_arms=3, prior_a=1, prior_b=1,
+                 cusum_h=6.0, cusum_k=0.02, buffer_size=40,
+                 forced_explore_after_reset=6, partial_reset=True,
+                 epsilon_probe=0.02, min_stick=3, switch_margin=0.05):
+        self.n_arms = n_arms
+        self.prior_a = float(prior_a)
+        self.prior_b = float(prior_b)
+        self.h = cusum_h
+        self.k = cusum_k
+        self.buffer_size = buffer_size
+        self.forced_explore_after_reset = forced_explore_after_reset
+        self.partial_reset = partial_reset
+
+        self.epsilon_probe = epsilon_probe
+        self.min_stick = min_stick
+        self.switch_margin = switch_margin
+
+        self.alpha = np.full(n_arms, self.prior_a)
+        self.beta = np.full(n_arms, self.prior_b)
+        self.G_pos = np.zeros(n_arms)
+        self.G_neg = np.zeros(n_arms)
+        self.forced_explore = np.zeros(n_arms, dtype=np.int64)
+
+        # ring buffers of observed proportions, one row per arm
+        self.ring = np.zeros((n_arms, buffer_size))
+        self.head = np.zeros(n_arms, dtype=np.int64)
+        self.count = np.zeros(n_arms, dtype=np.int64)
+        self.buf_sum = np.zeros(n_arms)
+
+        self.current_arm = None
+        self.current_arm_streak = 0
+
+    def posterior_mean(self):
+        a = np.maximum(self.alpha, 1e-6)
+        b = np.maximum(self.beta, 1e-6)
+        return a / (a + b)
+
+    def select_arm(self):
+        forced = np.flatnonzero(self.forced_explore > 0)
+        if forced.size:
+            return int(forced[0])
+
+        if random.random() < self.epsilon_probe:
+            choices = list(range(self.n_arms))
+            if self.current_arm is not None and len(choices) > 1:
+                choices.remove(self.current_arm)
+            return random.choice(choices)
+
+        samples = np.random.beta(np.maximum(self.alpha, 1e-6), np.maximum(self.beta, 1e-6))
+        best_idx = int(np.argmax(samples))
+
+        if self.current_arm is None:
+            self.current_arm = best_idx
+            self.current_arm_streak = 0
+            return best_idx
+
+        # during and after the min_stick streak the rule is the same:
+        # leave current_arm only for a sample better by switch_margin
+        if samples[best_idx] > samples[self.current_arm] + self.switch_margin:
+            return best_idx
+        return self.current_arm
+
+    def _reset_arm(self, arm):
+        if self.partial_reset:
+            self.alpha[arm] = max(self.prior_a, self.alpha[arm] * 0.2)
+            self.beta[arm] = max(self.prior_b, self.beta[arm] * 0.2)
+        else:
+            self.alpha[arm] = self.prior_a
+            self.beta[arm] = self.prior_b
+        self.head[arm] = 0
+        self.count[arm] = 0
+        self.buf_sum[arm] = 0.0
+        self.G_pos[arm] = 0.0
+        self.G_neg[arm] = 0.0
+        self.forced_explore[arm] = self.forced_explore_after_reset
+
+    def observe(self, arm_index, successes, trials):
+        arm = arm_index
+
+        s = max(0, int(successes))
+        t = max(1, int(trials))
+        self.alpha[arm] += s
+        self.beta[arm] += t - s
+
+        # push the proportion in the arm's ring buffer (none if buffer_size is 0)
+        if self.buffer_size:
+            head = self.head[arm]
+            if self.count[arm] == self.buffer_size:
+                self.buf_sum[arm] -= self.ring[arm, head]
+            else:
+                self.count[arm] += 1
+            self.ring[arm, head] = s / t
+            self.buf_sum[arm] += s / t
+            head += 1
+            if head == self.buffer_size:
+                head = 0
+                self.buf_sum[arm] = self.ring[arm, :self.count[arm]].sum()
+            self.head[arm] = head
+
+        # CUSUM against the mean of the buffer without the latest entry
+        if trials > 0 and self.count[arm] >= 2:
+            p_obs = successes / trials
+            ref_mean = (self.buf_sum[arm] - s / t) / (self.count[arm] - 1)
+            self.G_pos[arm] = max(0.0, self.G_pos[arm] + p_obs - ref_mean - self.k)
+            self.G_neg[arm] = max(0.0, self.G_neg[arm] + ref_mean - p_obs - self.k)
+            if self.G_pos[arm] > self.h or self.G_neg[arm] > self.h:
+                self._reset_arm(arm)
+
+        np.maximum(self.forced_explore - 1, 0, out=self.forced_explore)
+
+        if self.current_arm is None or arm_index != self.current_arm:
+            self.current_arm = arm_index
+            self.current_arm_streak = 1
+        else:
+            self.current_arm_streak += 1
+
+
+class BatchChangeAwareStickyTS:
+    """
+    ChangeAwareStickyTS over n_episodes independent episodes in lockstep.
+    State has shape (n_episodes, n_arms); select_arm returns one arm per
+    episode and observe takes vectors of arms, successes and trials.
+    Forced exploration, epsilon probing, stickiness and CUSUM resets are
+    applied with masks. current_arm is -1 until an episode picks an arm.
+    """
+
+    def __init__(self, n_episodes, n_arms=3, prior_a=1, prior_b=1,
+                 cusum_h=6.0, cusum_k=0.02, buffer_size=40,
+                 forced_explore_after_reset=6, partial_reset=True,
+                 epsilon_probe=0.02, min_stick=3, switch_margin=0.05, seed=None):
+        self.n_episodes = n_episodes
+        self.n_arms = n_arms
+        self.prior_a = float(prior_a)
+        self.prior_b = float(prior_b)
+        self.h = cusum_h
+        self.k = cusum_k
+        self.buffer_size = buffer_size
+        self.forced_explore_after_reset = forced_explore_after_reset
+        self.partial_reset = partial_reset
+
+        self.epsilon_probe = epsilon_probe
+        self.min_stick = min_stick
+        self.switch_margin = switch_margin
+
+        self.rng = np.random.default_rng(seed)
+
+        shape = (n_episodes, n_arms)
+        self.alpha = np.full(shape, self.prior_a)
+        self.beta = np.full(shape, self.prior_b)
+        self.G_pos = np.zeros(shape)
+        self.G_neg = np.zeros(shape)
+        self.forced_explore = np.zeros(shape, dtype=np.int64)
+
+        self.ring = np.zeros(shape + (buffer_size,))
+        self.head = np.zeros(shape, dtype=np.int64)
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.buf_sum = np.zeros(shape)
+
+        self.current_arm = np.full(n_episodes, -1, dtype=np.int64)
+        self.current_arm_streak = np.zeros(n_episodes, dtype=np.int64)
+
+        self._rows = np.arange(n_episodes)
+
+    def posterior_mean(self):
+        a = np.maximum(self.alpha, 1e-6)
+        b = np.maximum(self.beta, 1e-6)
+        return a / (a + b)
+
+    def select_arm(self):
+        rows = self._rows
+        has_current = self.current_arm >= 0
+
+        # 1. forced exploration: first arm with a pending counter
+        forced = self.forced_explore > 0
+        is_forced = forced.any(axis=1)
+        forced_arm = forced.argmax(axis=1)
+
+        # 2. epsilon probe: uniform among the arms other than current_arm
+        is_probe = ~is_forced & (self.rng.random(self.n_episodes) < self.epsilon_probe)
+        if self.n_arms > 1:
+            r = self.rng.integers(0, self.n_arms - 1, size=self.n_episodes)
+            probe_arm = np.where(has_current, r + (r >= self.current_arm), self.rng.integers(0, self.n_arms, size=self.n_episodes))
+        else:
+            probe_arm = np.zeros(self.n_episodes, dtype=np.int64)
+
+        # 3. Thompson sampling with switch margin
+        samples = self.rng.beta(np.maximum(self.alpha, 1e-6), np.maximum(self.beta, 1e-6))
+        best = samples.argmax(axis=1)
+        current = np.where(has_current, self.current_arm, best)
+        switch = samples[rows, best] > samples[rows, current] + self.switch_margin
+        ts_arm = np.where(switch, best, current)
+
+        # episodes without a current arm adopt their first sampled best
+        adopt = ~is_forced & ~is_probe & ~has_current
+        self.current_arm[adopt] = best[adopt]
+        self.current_arm_streak[adopt] = 0
+
+        return np.where(is_forced, forced_arm, np.where(is_probe, probe_arm, ts_arm))
+
+    def observe(self, arms, successes, trials, active=None):
+        """
+        arms, successes, trials: shape (n_episodes,)
+        active: episodes to update (default: trials > 0)
+        """
+        arms = np.asarray(arms)
+        successes = np.asarray(successes)
+        trials = np.asarray(trials)
+        if active is None:
+            active = trials > 0
+
+        r = self._rows[active]
+        a = arms[active]
+        s = np.maximum(successes[active], 0)
+        t = np.maximum(trials[active], 1)
+
+        self.alpha[r, a] += s
+        self.beta[r, a] += t - s
+
+        # push the proportions in the ring buffers (none if buffer_size is 0)
+        p_obs = s / t
+        if self.buffer_size:
+            head = self.head[r, a]
+            full = self.count[r, a] == self.buffer_size
+            self.buf_sum[r, a] -= np.where(full, self.ring[r, a, head], 0.0)
+            self.count[r, a] += ~full
+            self.ring[r, a, head] = p_obs
+            self.buf_sum[r, a] += p_obs
+            head = (head + 1) % self.buffer_size
+            self.head[r, a] = head
+
+            # resync the running sums of the buffers that completed a lap
+            lap = head == 0
+            if lap.any():
+                self.buf_sum[r[lap], a[lap]] = self.ring[r[lap], a[lap]].sum(axis=-1)
+
+        # CUSUM against the mean of the buffer without the latest entry
+        count = self.count[r, a]
+        valid = count >= 2
+        ref_mean = (self.buf_sum[r, a] - p_obs) / np.maximum(count - 1, 1)
+        g_pos = np.maximum(0.0, self.G_pos[r, a] + p_obs - ref_mean - self.k)
+        g_neg = np.maximum(0.0, self.G_neg[r, a] + ref_mean - p_obs - self.k)
+        self.G_pos[r, a] = np.where(valid, g_pos, self.G_pos[r, a])
+        self.G_neg[r, a] = np.where(valid, g_neg, self.G_neg[r, a])
+
+        change = valid & ((g_pos > self.h) | (g_neg > self.h))
+        if change.any():
+            rc, ac = r[change], a[change]
+            if self.partial_reset:
+                self.alpha[rc, ac] = np.maximum(self.prior_a, self.alpha[rc, ac] * 0.2)
+                self.beta[rc, ac] = np.maximum(self.prior_b, self.beta[rc, ac] * 0.2)
+            else:
+                self.alpha[rc, ac] = self.prior_a
+                self.beta[rc, ac] = self.prior_b
+            self.head[rc, ac] = 0
+            self.count[rc, ac] = 0
+            self.buf_sum[rc, ac] = 0.0
+            self.G_pos[rc, ac] = 0.0
+            self.G_neg[rc, ac] = 0.0
+            self.forced_explore[rc, ac] = self.forced_explore_after_reset
+
+        self.forced_explore[r] = np.maximum(self.forced_explore[r] - 1, 0)
+
+        same = a == self.current_arm[r]
+        self.current_arm_streak[r] = np.where(same, self.current_arm_streak[r] + 1, 1)
+        self.current_arm[r] = a
@@ -12,6 +12,7 @@ changing conditions.
 from abc import ABC, abstractmethod
 from api_client import SphinxAPIClient
 from data_collector import DataCollector
+import numpy as np
 import pandas as pd
 
 
@@ -126,12 +127,20 @@ class SimpleGreedyStrategy(MortyRescueStrategy):
 class AdaptiveStrategy(MortyRescueStrategy):
     """
     Adaptive strategy: continuously monitor and switch planets if needed.
+    
+    Every trip is recorded in the collector, whose running per-planet
+    statistics make each re-evaluation O(1). Survival rates change with
+    time, so at each re-evaluation the other planets are probed with a few
+    trips and only the trips made since the previous re-evaluation are
+    compared.
     """
     
     def execute_strategy(
         self,
         morties_per_trip: int = 3,
-        reevaluate_every: int = 50
+        reevaluate_every: int = 50,
+        switch_margin: float = 0.05,
+        probe_trips: int = 5
     ):
         """
         Execute the adaptive strategy.
@@ -139,6 +148,9 @@ class AdaptiveStrategy(MortyRescueStrategy):
         Args:
             morties_per_trip: Number of Morties to send per trip (1-3)
             reevaluate_every: Re-evaluate best planet every N trips
+            switch_margin: Switch when another planet's survival rate since the
+                           last re-evaluation beats the current one's by more than this
+            probe_trips: Trips sent to each other planet before re-evaluating
         """
         print("\n=== EXECUTING ADAPTIVE STRATEGY ===")
         
@@ -148,47 +160,57 @@ class AdaptiveStrategy(MortyRescueStrategy):
         print(f"Starting with {morties_remaining} Morties in Citadel")
         
         # Initial best planet
-        current_planet, current_planet_name = self.collector.get_best_planet(
-            self.exploration_data,
-            consider_trend=True
-        )
+        current_planet, current_planet_name = self.collector.get_best_planet(consider_trend=True)
         
         print(f"Starting with planet: {current_planet_name}")
         
         trips_since_evaluation = 0
         total_trips = 0
-        recent_results = []
+        stats = self.collector.stats
+        period_start = stats.n_trips
+        
+        def send(planet):
+            result = self.client.send_morties(planet, min(morties_per_trip, morties_remaining))
+            self.collector.record(planet, result)
+            return result
         
         while morties_remaining > 0:
             # Send Morties
-            morties_to_send = min(morties_per_trip, morties_remaining)
-            result = self.client.send_morties(current_planet, morties_to_send)
-            
-            # Track recent results
-            recent_results.append({
-                'planet': current_planet,
-                'survived': result['survived']
-            })
-            
+            result = send(current_planet)
             morties_remaining = result['morties_in_citadel']
             trips_since_evaluation += 1
             total_trips += 1
             
             # Re-evaluate strategy periodically
             if trips_since_evaluation >= reevaluate_every and morties_remaining > 0:
-                # Check if we should switch planets
-                recent_success_rate = sum(
-                    r['survived'] for r in recent_results[-reevaluate_every:]
-                ) / min(len(recent_results), reevaluate_every)
+                # Probe the other planets so that every rate covers the same period
+                for planet in range(stats.n_planets):
+                    for _ in range(probe_trips if planet != current_planet else 0):
+                        if morties_remaining <= 0:
+                            break
+                        result = send(planet)
+                        morties_remaining = result['morties_in_citadel']
+                        total_trips += 1
+                
+                # Share of trips that survived since the last re-evaluation
+                # ("survived" is per trip, and all trips carry the same number of Morties)
+                recent_rates = stats.rate(stats.since(period_start), per="trip")
+                recent_success_rate = recent_rates[current_planet]
                 
                 print(f"\n  Re-evaluating at trip {total_trips}...")
                 print(f"  Current planet: {current_planet_name}")
                 print(f"  Recent success rate: {recent_success_rate*100:.2f}%")
                 
-                # TODO: Implement logic to potentially switch planets
-                # For now, we stick with the same planet
+                # Check if we should switch planets
+                best_planet = int(np.nanargmax(recent_rates))
+                if recent_rates[best_planet] > recent_success_rate + switch_margin:
+                    current_planet = best_planet
+                    current_planet_name = self.client.get_planet_name(current_planet)
+                    print(f"  Switching to {current_planet_name} "
+                          f"({recent_rates[best_planet]*100:.2f}% recently)")
                 
                 trips_since_evaluation = 0
+                period_start = stats.n_trips
             
             if total_trips % 50 == 0:
                 print(f"  Progress: {total_trips} trips, "
@@ -1,7 +1,9 @@
 # strategy_ekf_sinus.py
+import math
 import numpy as np
 from dataclasses import dataclass
 from api_client import SphinxAPIClient
+from utils import survivors
 
 
 def clamp(x, a, b):
@@ -38,37 +40,125 @@ class EKFSinusPlanet:
 
 
     def predict(self):
-        self.state.P = self.state.P + self.Q
+        self.state.P += self.Q
 
 
     def update(self, t, y):
-        """EKF update avec observation binaire y."""
+        """
+        EKF update avec observation binaire y.
 
-        A, phi = self.state.x
-        w = self.w
+        Forme fermée : l'observation est scalaire, donc S est un scalaire et
+        K = P H^T / S. Calcul sur des floats, x et P mis à jour sur place.
+        """
+        x, P = self.state.x, self.state.P
+        A, phi = x.tolist()
+        (p00, p01), (p10, p11) = P.tolist()
 
-        h = self.c0 + A * np.cos(w * t + phi)
-        h = clamp(h, 0.001, 0.999)
+        c = math.cos(self.w * t + phi)
+        h = clamp(self.c0 + A * c, 0.001, 0.999)
 
-        dh_dA = np.cos(w * t + phi)
-        dh_dphi = -A * np.sin(w * t + phi)
+        dh_dA = c
+        dh_dphi = -A * math.sin(self.w * t + phi)
 
-        H = np.array([[dh_dA, dh_dphi]])   
+        # P H^T et H P
+        ph0 = p00 * dh_dA + p01 * dh_dphi
+        ph1 = p10 * dh_dA + p11 * dh_dphi
+        hp0 = dh_dA * p00 + dh_dphi * p10
+        hp1 = dh_dA * p01 + dh_dphi * p11
 
-        z = np.array([[y]]) - np.array([[h]])
+        S = dh_dA * ph0 + dh_dphi * ph1 + self.R.item()
+        k0, k1 = ph0 / S, ph1 / S
+        z = y - h
 
-        S = H @ self.state.P @ H.T + self.R
-        K = self.state.P @ H.T @ np.linalg.inv(S)
-
-        self.state.x = self.state.x + (K @ z).flatten()
-        self.state.P = (np.eye(2) - K @ H) @ self.state.P
+        x[0] = A + k0 * z
+        x[1] = phi + k1 * z
+        P[0, 0] = p00 - k0 * hp0
+        P[0, 1] = p01 - k0 * hp1
+        P[1, 0] = p10 - k1 * hp0
+        P[1, 1] = p11 - k1 * hp1
 
 
     def predict_prob(self, t):
-        A, phi = self.state.x
-        p = self.c0 + A * np.cos(self.w * t + phi)
+        A, phi = self.state.x.tolist()
+        p = self.c0 + A * math.cos(self.w * t + phi)
         return clamp(p, 0, 1)
-        
+
+
+class BatchEKFSinus:
+    """
+    N EKF sinus p(t) = c0 + A*cos(wt + φ) mis à jour ensemble :
+    x de forme (*shape, 2), P de forme (*shape, 2, 2).
+
+    Mêmes équations que EKFSinusPlanet, vectorisées : par exemple
+    shape=(n_episodes, 3) pour les 3 planètes de milliers d'épisodes.
+    """
+
+    def __init__(self, periods, c0=0.5, shape=None):
+        """
+        Args:
+            periods: période de chaque filtre, diffusée sur shape
+            c0: offset(s) connus, diffusés sur shape
+            shape: forme du lot (défaut : celle de periods)
+        """
+        shape = np.shape(periods) if shape is None else tuple(shape)
+        self.w = np.broadcast_to(2 * np.pi / np.asarray(periods, dtype=float), shape).copy()
+        self.c0 = np.broadcast_to(np.asarray(c0, dtype=float), shape).copy()
+
+        self.x = np.zeros(shape + (2,))
+        self.x[..., 0] = 0.1
+        self.P = np.broadcast_to(np.eye(2) * 0.5, shape + (2, 2)).copy()
+
+        self.Q = np.eye(2) * 1e-4
+        self.R = 0.05
+
+    def predict(self, mask=None):
+        """P += Q, pour les filtres de mask (tous par défaut)."""
+        if mask is None:
+            self.P += self.Q
+        else:
+            self.P[mask] += self.Q
+
+    def update(self, t, y, mask=None):
+        """
+        EKF update de tous les filtres (ou de ceux de mask).
+
+        Args:
+            t: temps de chaque filtre, diffusé sur shape
+            y: observation de chaque filtre, diffusée sur shape
+            mask: booléens de forme shape ; les autres filtres ne bougent pas
+        """
+        A, phi = self.x[..., 0], self.x[..., 1]
+        p00, p01 = self.P[..., 0, 0], self.P[..., 0, 1]
+        p10, p11 = self.P[..., 1, 0], self.P[..., 1, 1]
+
+        arg = self.w * t + phi
+        c = np.cos(arg)
+        h = np.clip(self.c0 + A * c, 0.001, 0.999)
+
+        dh_dA = c
+        dh_dphi = -A * np.sin(arg)
+
+        ph0 = p00 * dh_dA + p01 * dh_dphi
+        ph1 = p10 * dh_dA + p11 * dh_dphi
+        hp0 = dh_dA * p00 + dh_dphi * p10
+        hp1 = dh_dA * p01 + dh_dphi * p11
+
+        S = dh_dA * ph0 + dh_dphi * ph1 + self.R
+        k0, k1 = ph0 / S, ph1 / S
+        z = y - h
+        if mask is not None:
+            k0 = np.where(mask, k0, 0.0)
+            k1 = np.where(mask, k1, 0.0)
+
+        dx = np.stack([k0 * z, k1 * z], axis=-1)
+        dP = np.stack([k0 * hp0, k0 * hp1, k1 * hp0, k1 * hp1], axis=-1)
+        self.x += dx
+        self.P -= dP.reshape(dP.shape[:-1] + (2, 2))
+
+    def predict_prob(self, t):
+        """Probabilité prédite de chaque filtre au temps t."""
+        return np.clip(self.c0 + self.x[..., 0] * np.cos(self.w * t + self.x[..., 1]), 0, 1)
+
 
 class EKFSinusStrategy:
 
@@ -99,7 +189,7 @@ class EKFSinusStrategy:
             print(f"\nExploration of planet {planet}")
             for _ in range(self.explore_steps):
                 res = self.client.send_morties(planet, 1)
-                y = float(res["survived"])
+                y = float(survivors(res))
 
                 self.models[planet].predict()
                 self.models[planet].update(self.t[planet], y)
@@ -127,7 +217,7 @@ class EKFSinusStrategy:
             res = self.client.send_morties(best, send)
             remaining = res["morties_in_citadel"]
 
-            y = (res["survived"] == send)
+            y = (survivors(res) == send)
             y = float(y)
 
             self.models[best].predict()
@@ -139,3 +229,52 @@ class EKFSinusStrategy:
             print(f"Sent {send} to planet {best}, survived={y}")
 
 
+class BatchEKFSinusStrategy:
+    """
+    EKFSinusStrategy pour n_episodes épisodes simulés ensemble (voir
+    evaluate_strategy.run_batch) : select_arm() -> (n_episodes,) bras,
+    trip_sizes(morties_per_trip) -> Morties par envoi,
+    observe(arms, successes, trials).
+
+    Comme EKFSinusStrategy : explore_steps envois d'un Morty par planète
+    (0, puis 1, puis 2, y = survived), puis toujours la planète de
+    meilleure prédiction avec morties_per_trip Morties (y vaut 1 si tous
+    ont survécu). Le temps de chaque planète est son nombre d'envois.
+    """
+
+    def __init__(self, n_episodes, explore_steps=80, periods=(10, 20, 200), c0=0.5, seed=None):
+        """
+        seed : accepté pour evaluate_batch (make_batch_policy(n, seed=...)),
+        ignoré : la stratégie est déterministe.
+        """
+        self.n_episodes = n_episodes
+        self.explore_steps = explore_steps
+        self.models = BatchEKFSinus(periods, c0=c0, shape=(n_episodes, len(periods)))
+        self.t = np.zeros((n_episodes, len(periods)), dtype=np.int64)
+        self.trips = np.zeros(n_episodes, dtype=np.int64)
+        self._rows = np.arange(n_episodes)
+
+    def _exploring(self):
+        return self.trips < self.explore_steps * self.t.shape[1]
+
+    def select_arm(self):
+        arms = np.argmax(self.models.predict_prob(self.t), axis=1)
+        return np.where(self._exploring(), self.trips // self.explore_steps, arms)
+
+    def trip_sizes(self, morties_per_trip):
+        """Morties du prochain envoi de chaque épisode : 1 en exploration."""
+        return np.where(self._exploring(), 1, morties_per_trip)
+
+    def observe(self, arms, successes, trials, active=None):
+        arms = np.asarray(arms)
+        active = np.asarray(trials) > 0 if active is None else np.asarray(active, dtype=bool)
+
+        mask = np.zeros(self.t.shape, dtype=bool)
+        mask[self._rows, arms] = active
+        y = np.zeros(self.t.shape)
+        y[self._rows, arms] = (np.asarray(successes) == np.asarray(trials))
+
+        self.models.predict(mask)
+        self.models.update(self.t, y, mask)
+        self.t += mask
+        self.trips += active
@@ -0,0 +1,188 @@
+# strategy_rls_sinus.py
+"""
+Online sinus estimation by recursive least squares (RLS).
+
+With the planet periods known (see local_env), the survival rate of a
+planet is linear in its parameters:
+
+    p(t) = c0 + A*cos(w*t + phi) = c0 + a*cos(w*t) + b*sin(w*t)
+
+so (c0, a, b) can be tracked with RLS: each observation costs a fixed 3x3
+update instead of a refit on the whole history, and a forgetting factor
+lets the estimate follow slow drifts. t is the global trip counter
+(steps_taken), which is what the planets' clocks follow.
+"""
+
+import numpy as np
+import pandas as pd
+
+from strategy import MortyRescueStrategy
+from utils import survivors
+
+
+class RLSSinusEstimator:
+    """
+    Per-planet RLS estimates of (c0, a, b) for known periods.
+
+    theta[p] holds (c0, a, b) of planet p, P[p] its RLS gain matrix;
+    covariance() scales it by the running residual variance.
+    """
+
+    def __init__(self, periods=(10, 20, 200), forgetting=0.995, c0=0.5, prior_var=1.0):
+        """
+        Args:
+            periods: Period of each planet, in trips
+            forgetting: Forgetting factor lambda in (0, 1]; observations
+                        are weighted by lambda**age (1 = ordinary least squares)
+            c0: Prior offset of every planet
+            prior_var: Prior variance of (c0, a, b), relative to the noise
+        """
+        self.w = 2 * np.pi / np.asarray(periods, dtype=float)
+        self.forgetting = forgetting
+        n = len(self.w)
+
+        self.theta = np.zeros((n, 3))
+        self.theta[:, 0] = c0
+        self.P = np.tile(np.eye(3) * prior_var, (n, 1, 1))
+        self.noise_var = np.full(n, 0.25)     # Bernoulli variance at p = 0.5
+        self.n_obs = np.zeros(n, dtype=int)
+
+    def _features(self, planet, t):
+        wt = self.w[planet] * t
+        return np.array([1.0, np.cos(wt), np.sin(wt)])
+
+    def update(self, planet, t, y, weight=1.0):
+        """
+        Add one observation.
+
+        Args:
+            planet: Planet index
+            t: Global trip index of the observation
+            y: Observed survival rate (survived / sent)
+            weight: Observation weight, e.g. the number of Morties sent
+        """
+        x = self._features(planet, t)
+        P = self.P[planet]
+        lam = self.forgetting
+
+        Px = P @ x
+        error = y - x @ self.theta[planet]
+        gain = Px * (weight / (lam + weight * (x @ Px)))
+
+        self.theta[planet] += gain * error
+        self.P[planet] = (P - np.outer(gain, Px)) / lam
+        self.n_obs[planet] += 1
+        # running mean at first, then exponential forgetting like theta
+        rate = max(1 - lam, 1 / self.n_obs[planet])
+        self.noise_var[planet] += rate * (weight * error * error - self.noise_var[planet])
+
+    def update_many(self, planets, ts, ys, weights=None):
+        """Add observations in order (see update)."""
+        weights = np.ones(len(ys)) if weights is None else weights
+        for planet, t, y, weight in zip(planets, ts, ys, weights):
+            self.update(int(planet), float(t), float(y), float(weight))
+
+    def covariance(self, planet):
+        """Covariance of the (c0, a, b) estimate of a planet."""
+        return self.P[planet] * self.noise_var[planet]
+
+    def predict(self, t, planet=None):
+        """
+        Predicted survival rate at global trip index t.
+
+        Returns:
+            Rate of the planet, or an array with every planet's rate
+        """
+        if planet is not None:
+            return float(self._features(planet, t) @ self.theta[planet])
+        wt = self.w * t
+        return self.theta[:, 0] + self.theta[:, 1] * np.cos(wt) + self.theta[:, 2] * np.sin(wt)
+
+    def predict_std(self, t):
+        """Standard deviation of every planet's predicted rate at t."""
+        wt = self.w * t
+        x = np.stack([np.ones_like(wt), np.cos(wt), np.sin(wt)], axis=1)    # (n, 3)
+        var = np.einsum("pi,pij,pj->p", x, self.P, x) * self.noise_var
+        return np.sqrt(np.maximum(var, 0))
+
+    @property
+    def amplitude(self):
+        return np.hypot(self.theta[:, 1], self.theta[:, 2])
+
+    @property
+    def phase(self):
+        return np.arctan2(-self.theta[:, 2], self.theta[:, 1])
+
+
+class RLSSinusStrategy(MortyRescueStrategy):
+    """
+    Explore every planet, then always send to the planet with the highest
+    predicted survival rate at the next trip (plus an exploration bonus),
+    updating the RLS estimates after each trip.
+    """
+
+    def __init__(self, client, periods=(10, 20, 200), forgetting=0.995, bonus=0.5):
+        """
+        Args:
+            client: SphinxAPIClient instance
+            periods: Period of each planet, in trips
+            forgetting: RLS forgetting factor
+            bonus: Weight of the prediction's standard deviation in the score
+        """
+        super().__init__(client)
+        self.estimator = RLSSinusEstimator(periods, forgetting)
+        self.bonus = bonus
+
+    def observe(self, planet, result):
+        """Update the estimates with a send_morties response."""
+        sent = result["morties_sent"]
+        if sent:
+            # steps_taken counts the trip just made
+            self.estimator.update(planet, result["steps_taken"] - 1,
+                                  survivors(result) / sent, weight=sent)
+
+    def explore_phase(self, trips_per_planet: int = 30) -> pd.DataFrame:
+        df = super().explore_phase(trips_per_planet)
+        self.estimator.update_many(
+            df["planet"].to_numpy(), df["steps_taken"].to_numpy() - 1,
+            df["survived"].to_numpy() / df["morties_sent"].to_numpy(),
+            df["morties_sent"].to_numpy()
+        )
+        return df
+
+    def choose_planet(self, t) -> int:
+        """Planet with the best optimistic prediction at trip t."""
+        score = self.estimator.predict(t) + self.bonus * self.estimator.predict_std(t)
+        return int(np.argmax(score))
+
+    def execute_strategy(self, morties_per_trip: int = 3):
+        """
+        Execute the RLS strategy.
+
+        Args:
+            morties_per_trip: Number of Morties to send per trip (1-3)
+        """
+        print("\n=== EXECUTING RLS SINUS STRATEGY ===")
+
+        status = self.client.get_status()
+        morties_remaining = status['morties_in_citadel']
+        steps = status['steps_taken']
+
+        while morties_remaining > 0:
+            planet = self.choose_planet(steps)
+            result = self.client.send_morties(planet, min(morties_per_trip, morties_remaining))
+            self.observe(planet, result)
+
+            morties_remaining = result['morties_in_citadel']
+            steps = result['steps_taken']
+
+            if steps % 50 == 0:
+                print(f"  Progress: {steps} trips, "
+                      f"{result['morties_on_planet_jessica']} saved")
+
+        final_status = self.client.get_status()
+        print("\n=== FINAL RESULTS ===")
+        print(f"Morties Saved: {final_status['morties_on_planet_jessica']}")
+        print(f"Morties Lost: {final_status['morties_lost']}")
+        print(f"Total Steps: {final_status['steps_taken']}")
+        print(f"Success Rate: {(final_status['morties_on_planet_jessica']/1000)*100:.2f}%")
@@ -0,0 +1,167 @@
+"""
+Columnar trip log for the Morty Express Challenge.
+
+TripBuffer stores trips as one preallocated, growable NumPy array per field
+instead of one dict per trip. The planet is stored as int8 and planet_name
+is derived from it (plain strings, looked up by planet), so to_dataframe()
+builds a DataFrame whose other columns are views of the buffer (no copy).
+"""
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils import PLANET_NAMES
+
+
+# Field -> dtype of a trip, in DataCollector column order (planet_name is derived)
+TRIP_SCHEMA = {
+    "trip_number": np.int32,
+    "planet": np.int8,
+    "morties_sent": np.int8,
+    "survived": np.int16,
+    "steps_taken": np.int32,
+    "morties_in_citadel": np.int32,
+    "morties_on_planet_jessica": np.int32,
+    "morties_lost": np.int32,
+}
+
+# planet -> planet_name lookup table; planet_name stays a plain string column
+# (a categorical would make groupby("planet_name") add unobserved planets)
+PLANET_NAME_ARRAY = np.array([PLANET_NAMES[i] for i in sorted(PLANET_NAMES)], dtype=object)
+
+RESULT_FIELDS = (
+    "morties_sent", "survived", "steps_taken",
+    "morties_in_citadel", "morties_on_planet_jessica", "morties_lost"
+)
+
+
+class TripBuffer:
+    """Preallocated, growable columnar buffer of trips."""
+
+    def __init__(self, schema: Optional[Dict] = None, capacity: int = 1024):
+        """
+        Initialize an empty buffer.
+
+        Args:
+            schema: Field -> NumPy dtype (default: TRIP_SCHEMA). Must contain "planet".
+            capacity: Initial number of rows; doubled whenever the buffer is full
+        """
+        self.schema = dict(schema or TRIP_SCHEMA)
+        self.capacity = max(1, capacity)
+        self.n = 0
+        self.columns = {
+            name: np.zeros(self.capacity, dtype=dtype) for name, dtype in self.schema.items()
+        }
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, old in self.columns.items():
+            new = np.zeros(self.capacity, dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            self.columns[name] = new
+
+    def append(self, **fields):
+        """
+        Append one trip. Fields missing from the call are stored as 0;
+        fields outside the schema (e.g. planet_name) are ignored.
+        """
+        if self.n == self.capacity:
+            self._grow()
+        n = self.n
+        for name, column in self.columns.items():
+            column[n] = fields.get(name, 0)
+        self.n += 1
+
+    def append_result(self, planet: int, result: Dict, **extra):
+        """
+        Append the response of SphinxAPIClient.send_morties.
+
+        Args:
+            planet: Planet the Morties were sent to
+            result: API response
+            **extra: Other fields of the schema (e.g. trip_number)
+        """
+        fields = {name: result[name] for name in RESULT_FIELDS if name in result}
+        self.append(planet=planet, **fields, **extra)
+
+    def extend(self, records: Iterable[Dict]):
+        """Append trips given as dicts (e.g. legacy list-of-dict logs)."""
+        for record in records:
+            self.append(**record)
+
+    def column(self, name: str) -> np.ndarray:
+        """View of the filled part of a column."""
+        return self.columns[name][:self.n]
+
+    def clear(self):
+        """
+        Empty the buffer. Fresh arrays are allocated, so DataFrames returned
+        by to_dataframe() earlier keep their data.
+        """
+        self.n = 0
+        self.columns = {
+            name: np.zeros(self.capacity, dtype=dtype) for name, dtype in self.schema.items()
+        }
+
+    def to_dataframe(self, start: int = 0) -> pd.DataFrame:
+        """
+        DataFrame of the trips from row start, without copying.
+
+        The schema columns are views of the buffer: appending more trips does
+        not change the returned DataFrame, and clear() allocates new storage.
+
+        Args:
+            start: First row to include
+
+        Returns:
+            DataFrame with the schema columns, plus planet_name right after
+            planet
+        """
+        data = {}
+        for name, column in self.columns.items():
+            data[name] = column[start:self.n]
+            if name == "planet":
+                data["planet_name"] = PLANET_NAME_ARRAY[data[name]]
+        return pd.DataFrame(data, copy=False)
+
+    def to_records(self) -> list:
+        """Trips as a list of dicts (legacy format)."""
+        return self.to_dataframe().to_dict("records")
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, schema: Optional[Dict] = None) -> "TripBuffer":
+        """
+        Build a buffer from a DataFrame (e.g. a loaded CSV).
+
+        Numeric and boolean columns outside the schema are kept with their
+        own dtype; "True"/"False" strings are converted to 1/0.
+
+        Args:
+            df: Trip data
+            schema: Base schema (default: TRIP_SCHEMA)
+
+        Returns:
+            TripBuffer holding the rows of df
+        """
+        schema = dict(schema or TRIP_SCHEMA)
+        for name in df.columns:
+            if name not in schema and name != "planet_name" and (
+                pd.api.types.is_numeric_dtype(df[name]) or pd.api.types.is_bool_dtype(df[name])
+            ):
+                schema[name] = df[name].dtype
+
+        buffer = cls(schema, capacity=max(1, len(df)))
+        for name in schema:
+            if name not in df.columns:
+                continue
+            values = df[name]
+            if not (pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values)):
+                values = pd.to_numeric(values.astype(str).replace({"True": "1", "False": "0"}))
+            buffer.columns[name][:len(df)] = values.to_numpy()
+        buffer.n = len(df)
+        return buffer
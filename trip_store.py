@@ -0,0 +1,440 @@
+"""
+Typed, partitioned storage of trip data, and a buffered CSV writer.
+
+Trips are written as a dataset directory partitioned by run and planet
+(hive layout: <root>/run=0/planet=2/...). With pyarrow installed the
+partitions are Parquet files; without it they are .npz files holding one
+typed array per column. Loading supports column projection and filters:
+partitions that cannot match are skipped, and only the requested columns
+are read. Plain .csv paths are still read and written for compatibility.
+
+BufferedCSVWriter appends rows to a CSV kept open between trips, and
+commit() checkpoints it so an interrupted campaign can resume.
+
+    save_trips(df, "planet_measurements")
+    df = load_trips("planet_measurements", columns=["trip_index", "survived"],
+                    filters=[("planet", "==", 2), ("run", "in", [0, 1])])
+"""
+
+import csv
+import json
+import operator
+import os
+import shutil
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from trip_buffer import PLANET_NAME_ARRAY
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+PARTITION_COLS = ("run", "planet")
+
+_OPS = {
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda a, b: np.isin(a, list(b)),
+    "not in": lambda a, b: ~np.isin(a, list(b)),
+}
+
+
+def _fix_survived(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert a text 'survived' column (True/False/1/0) to int."""
+    if "survived" in df and not (pd.api.types.is_numeric_dtype(df["survived"])
+                                 or pd.api.types.is_bool_dtype(df["survived"])):
+        df["survived"] = df["survived"].astype(str).map(
+            {"True": 1, "False": 0, "1": 1, "0": 0}
+        ).astype(int)
+    return df
+
+
+def _apply_filters(df: pd.DataFrame, filters: Optional[Sequence[Tuple]]) -> pd.DataFrame:
+    if not filters:
+        return df
+    mask = np.ones(len(df), dtype=bool)
+    for column, op, value in filters:
+        mask &= np.asarray(_OPS[op](df[column].to_numpy(), value))
+    return df[mask].reset_index(drop=True)
+
+
+def _part_name(extension: str) -> str:
+    """Unique part file name; names sort in write order, so appends load in order."""
+    return f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}{extension}"
+
+
+def default_format() -> str:
+    """'parquet' when pyarrow is installed, 'npz' otherwise."""
+    return "parquet" if HAS_PYARROW else "npz"
+
+
+def _replace_path(new: str, path: str):
+    """Move new to path, then delete what path held before."""
+    if not os.path.exists(path):
+        os.replace(new, path)
+        return
+    old = f"{path}.old-{uuid.uuid4().hex[:8]}"
+    os.replace(path, old)
+    os.replace(new, path)
+    if os.path.isdir(old):
+        shutil.rmtree(old)
+    else:
+        os.remove(old)
+
+
+def save_trips(df: pd.DataFrame, path: str, partition_cols: Sequence[str] = PARTITION_COLS,
+               format: Optional[str] = None, mode: str = "append") -> str:
+    """
+    Append trips to a dataset (or write a CSV file).
+
+    Args:
+        df: Trip data
+        path: Dataset directory, or a .csv file
+        partition_cols: Partition columns (those missing from df are skipped;
+                        empty to keep the rows in one file, in order)
+        format: 'parquet', 'npz' or 'csv' (default: csv for .csv paths,
+                otherwise parquet when pyarrow is installed, else npz)
+        mode: 'append' to add the trips to the dataset, 'overwrite' to
+              replace it (written next to it, then swapped in)
+
+    Returns:
+        Format used
+    """
+    if mode not in ("append", "overwrite"):
+        raise ValueError(f"Unknown mode '{mode}'")
+    if format is None:
+        format = "csv" if path.endswith(".csv") else default_format()
+
+    if format == "csv":
+        if mode == "overwrite":
+            df.to_csv(path, index=False)
+        else:
+            df.to_csv(path, index=False, mode="a", header=not os.path.isfile(path))
+        return format
+
+    if mode == "overwrite":
+        path = path.rstrip(os.sep)
+        tmp_path = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+        format = save_trips(df, tmp_path, partition_cols, format)
+        _replace_path(tmp_path, path)
+        return format
+
+    partition_cols = [c for c in partition_cols if c in df.columns]
+    # planet_name is derived from planet on load
+    df = df.drop(columns=["planet_name"], errors="ignore")
+
+    if format == "parquet":
+        if not HAS_PYARROW:
+            raise ImportError("Parquet storage needs pyarrow (pip install pyarrow)")
+        if partition_cols:
+            df.to_parquet(path, partition_cols=partition_cols, index=False,
+                          basename_template=_part_name("-{i}.parquet"))
+        else:
+            os.makedirs(path, exist_ok=True)
+            df.to_parquet(os.path.join(path, _part_name(".parquet")), index=False)
+        return format
+
+    if format != "npz":
+        raise ValueError(f"Unknown format '{format}'")
+
+    groups = df.groupby(partition_cols, sort=False) if partition_cols else [((), df)]
+    for keys, part in groups:
+        keys = keys if isinstance(keys, tuple) else (keys,)
+        directory = os.path.join(path, *(f"{c}={k}" for c, k in zip(partition_cols, keys)))
+        os.makedirs(directory, exist_ok=True)
+        columns = {c: part[c].to_numpy() for c in part.columns if c not in partition_cols}
+        np.savez(os.path.join(directory, _part_name(".npz")), **columns)
+    return format
+
+
+def _partition_values(directory: str, root: str) -> dict:
+    values = {}
+    rel = os.path.relpath(directory, root)
+    if rel == ".":
+        return values
+    for piece in rel.split(os.sep):
+        key, _, value = piece.partition("=")
+        try:
+            values[key] = int(value)
+        except ValueError:
+            values[key] = value
+    return values
+
+
+def _load_npz(path: str, columns: Optional[List[str]], filters: Optional[Sequence[Tuple]]) -> pd.DataFrame:
+    frames = []
+    for directory, _, files in sorted(os.walk(path)):
+        parts = sorted(f for f in files if f.endswith(".npz"))
+        if not parts:
+            continue
+
+        keys = _partition_values(directory, path)
+        # partition pruning: skip directories whose keys fail a filter
+        if any(c in keys and not _OPS[op](np.asarray([keys[c]]), v)[0]
+               for c, op, v in (filters or [])):
+            continue
+
+        for name in parts:
+            with np.load(os.path.join(directory, name)) as npz:
+                wanted = set(columns) if columns is not None else set(npz.files)
+                wanted |= {c for c, _, _ in (filters or []) if c in npz.files}
+                # projection: only the needed members of the archive are read
+                data = {c: npz[c] for c in npz.files if c in wanted}
+                # the row count comes from a data member, read one if none was wanted
+                # (e.g. only partition columns requested)
+                n = len(next(iter(data.values())) if data else npz[npz.files[0]]) if npz.files else 0
+            for key, value in keys.items():
+                if columns is None or key in columns:
+                    data[key] = np.full(n, value)
+            frames.append(pd.DataFrame(data))
+
+    if not frames:
+        return pd.DataFrame(columns=columns or [])
+    df = pd.concat(frames, ignore_index=True)
+    return _apply_filters(df, [f for f in (filters or []) if f[0] in df.columns])
+
+
+def load_trips(path: str, columns: Optional[List[str]] = None,
+               filters: Optional[Sequence[Tuple]] = None) -> pd.DataFrame:
+    """
+    Load trips from a dataset directory or a CSV file.
+
+    Args:
+        path: Dataset directory (Parquet or .npz partitions) or .csv file
+        columns: Columns to read (None = all). planet_name is rebuilt from
+                 planet when requested.
+        filters: List of (column, op, value) with op in ==, !=, <, <=, >, >=,
+                 in, not in. Partitions are pruned before reading.
+
+    Returns:
+        DataFrame with typed columns
+
+    Raises:
+        FileNotFoundError: If path does not exist
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No trip data at '{path}'")
+
+    want_name = columns is not None and "planet_name" in columns
+    read_columns = None
+    if columns is not None:
+        read_columns = [c for c in columns if c != "planet_name"]
+        if want_name and "planet" not in read_columns:
+            read_columns.append("planet")
+
+    if os.path.isfile(path):
+        usecols = None
+        if read_columns is not None:
+            usecols = read_columns + [c for c, _, _ in (filters or []) if c not in read_columns]
+        df = pd.read_csv(path, usecols=usecols)
+        df = _apply_filters(_fix_survived(df), filters)
+    elif any(f.endswith(".parquet") for _, _, files in os.walk(path) for f in files):
+        df = pd.read_parquet(path, columns=read_columns,
+                             filters=[tuple(f) for f in filters] if filters else None)
+        # hive partition keys come back as categoricals
+        for c in PARTITION_COLS:
+            if c in df and isinstance(df[c].dtype, pd.CategoricalDtype):
+                df[c] = df[c].astype(np.int64)
+    else:
+        df = _load_npz(path, read_columns, filters)
+
+    if "planet" in df and (columns is None or want_name):
+        df["planet_name"] = PLANET_NAME_ARRAY[df["planet"].to_numpy(dtype=np.int64)]
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    return df
+
+
+def convert_csv(csv_path: str, path: str, format: Optional[str] = None) -> str:
+    """
+    Convert a trip CSV (e.g. planet_measurements.csv) to a partitioned dataset.
+
+    Returns:
+        Format used
+    """
+    df = _fix_survived(pd.read_csv(csv_path))
+    return save_trips(df, path, format=format)
+
+
+class BufferedCSVWriter:
+    """
+    CSV writer that keeps its file open and flushes in batches.
+
+    Rows are flushed to the OS every flush_rows rows or flush_interval
+    seconds. commit() fsyncs the file and atomically writes a checkpoint
+    next to it ({path}.ckpt.json) with the committed byte offset, row count
+    and a caller-defined state. Reopening the file resumes from the
+    checkpoint: rows written after the last commit (e.g. by a crashed run)
+    are truncated away, and the committed state is available as .state.
+    A file without a checkpoint is checkpointed when opened, right after
+    its header (or its existing rows).
+
+        with BufferedCSVWriter("planet_measurements.csv", FIELDS) as writer:
+            done = writer.state.get("completed", [])
+            ...
+            writer.writerow(row)
+            ...
+            writer.commit({"completed": done + [run]})
+    """
+
+    def __init__(self, path: str, fieldnames: Sequence[str], flush_rows: int = 500,
+                 flush_interval: float = 5.0, checkpoint_path: Optional[str] = None):
+        """
+        Open (or resume) the CSV file.
+
+        Args:
+            path: CSV file to append to
+            fieldnames: Columns, in order (header written if the file is empty)
+            flush_rows: Flush after this many buffered rows
+            flush_interval: Flush when a row is written this many seconds
+                            after the previous flush
+            checkpoint_path: Checkpoint file (default: path + ".ckpt.json")
+        """
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.checkpoint_path = checkpoint_path or path + ".ckpt.json"
+
+        self.state: Dict = {}
+        self.rows = 0
+        self.committed_rows = 0
+        self.committed_offset = None
+
+        if os.path.isfile(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+            self.state = checkpoint.get("state", {})
+            self.rows = self.committed_rows = checkpoint["rows"]
+            self.committed_offset = checkpoint["offset"]
+            if os.path.isfile(path) and os.path.getsize(path) > self.committed_offset:
+                os.truncate(path, self.committed_offset)
+
+        self._file = open(path, "a", newline="", buffering=1 << 20)
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction="ignore")
+        if self._file.tell() == 0:
+            self._writer.writeheader()
+        if self.committed_offset is None:
+            # checkpoint the starting point, so rows of a run that crashes
+            # before its first commit() are truncated on resume
+            self.commit()
+
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def writerow(self, row: Dict):
+        """Buffer one row."""
+        self._writer.writerow(row)
+        self.rows += 1
+        self._pending += 1
+        if self._pending >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def writerows(self, rows):
+        """Buffer several rows."""
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self):
+        """Hand the buffered rows to the OS (no fsync)."""
+        self._file.flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def commit(self, state: Optional[Dict] = None):
+        """
+        Make every row written so far durable and checkpoint it.
+
+        Args:
+            state: JSON-serializable state stored with the checkpoint
+                   (default: keep the current state)
+        """
+        if state is not None:
+            self.state = state
+        self.flush()
+        os.fsync(self._file.fileno())
+        self.committed_offset = self._file.tell()
+        self.committed_rows = self.rows
+
+        checkpoint = {"offset": self.committed_offset, "rows": self.rows, "state": self.state}
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def rollback(self):
+        """Discard the rows written since the last commit."""
+        self._file.flush()
+        self._file.truncate(self.committed_offset)
+        self._file.seek(self.committed_offset)
+        self.rows = self.committed_rows
+        self._pending = 0
+
+    def filter_rows(self, keep: Callable[[Dict], bool], state: Optional[Dict] = None):
+        """
+        Rewrite the file without the rows rejected by keep, then commit.
+
+        Used to drop rows that rollback() cannot reach, e.g. rows of a failed
+        run interleaved with committed rows of other runs.
+
+        Args:
+            keep: Predicate on a row, read back as a dict of strings
+            state: State stored with the new checkpoint (see commit)
+        """
+        self.flush()
+        self._file.close()
+        tmp_path = self.path + ".tmp"
+        rows = 0
+        with open(self.path, newline="") as src, open(tmp_path, "w", newline="") as dst:
+            writer = csv.DictWriter(dst, fieldnames=self.fieldnames, extrasaction="ignore")
+            writer.writeheader()
+            for row in csv.DictReader(src):
+                if keep(row):
+                    writer.writerow(row)
+                    rows += 1
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp_path, self.path)
+
+        self._file = open(self.path, "a", newline="", buffering=1 << 20)
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction="ignore")
+        self.rows = rows
+        self.commit(state)
+
+    def close(self):
+        """Flush and close the file. Uncommitted rows are kept until the next resume."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 3:
+        print("Usage: python trip_store.py <trips.csv> <dataset_dir>")
+        sys.exit(1)
+
+    fmt = convert_csv(sys.argv[1], sys.argv[2])
+    print(f"Converted {sys.argv[1]} to {sys.argv[2]} ({fmt})")
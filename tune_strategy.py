@@ -0,0 +1,261 @@
+"""
+Hyperparameter search for ChangeAwareStickyTS on the local simulator.
+
+Configurations are generated by grid or random search and scored with
+successive halving: every configuration gets a small episode budget, the
+best 1/eta are kept and re-scored with eta times more episodes, and so on.
+Losing configurations are pruned after a few hundred episodes instead of
+burning a full budget (or real API episodes).
+
+Every evaluation is appended to a CSV leaderboard.
+"""
+
+import itertools
+import json
+import os
+import random
+from datetime import datetime
+from functools import partial
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from evaluate_strategy import evaluate_many
+from strat_second import ChangeAwareStickyTS
+
+
+LEADERBOARD_FILE = "tuning_leaderboard.csv"
+
+# list -> discrete choices, (low, high) tuple -> uniform range (random search only)
+SEARCH_SPACE = {
+    "cusum_h": [2.0, 3.0, 4.0, 6.0, 8.0],
+    "cusum_k": [0.005, 0.01, 0.015, 0.02, 0.03],
+    "buffer_size": [15, 25, 40, 60],
+    "min_stick": [1, 2, 3, 5],
+    "switch_margin": [0.0, 0.02, 0.05, 0.1],
+    "epsilon_probe": [0.0, 0.02, 0.05, 0.1],
+    "forced_explore_after_reset": [2, 4, 6, 8],
+    "partial_reset": [True, False],
+}
+
+# Parameters of ChangeAwareStickyTS that are not searched
+FIXED_PARAMS = {
+    "n_arms": 3,
+    "prior_a": 1,
+    "prior_b": 1,
+}
+
+
+def grid_configs(space: Dict) -> List[Dict]:
+    """
+    All combinations of the discrete values of a search space.
+
+    Args:
+        space: Dict of parameter -> list of values
+
+    Returns:
+        List of configuration dicts
+    """
+    names = list(space)
+    for name in names:
+        if not isinstance(space[name], list):
+            raise ValueError(f"Grid search needs a list of values for '{name}'")
+    return [dict(zip(names, values)) for values in itertools.product(*space.values())]
+
+
+def random_configs(space: Dict, n_configs: int, seed: int = 0) -> List[Dict]:
+    """
+    Sample configurations at random from a search space.
+
+    Args:
+        space: Dict of parameter -> list of values or (low, high) range.
+               Ranges with two ints are sampled as ints.
+        n_configs: Number of configurations to draw
+        seed: Seed of the sampler
+
+    Returns:
+        List of distinct configuration dicts
+    """
+    rng = random.Random(seed)
+    configs = []
+    seen = set()
+
+    for _ in range(n_configs * 20):
+        config = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    config[name] = rng.randint(low, high)
+                else:
+                    config[name] = rng.uniform(low, high)
+            else:
+                config[name] = rng.choice(values)
+
+        key = tuple(sorted(config.items()))
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+        if len(configs) == n_configs:
+            break
+
+    return configs
+
+
+def make_factory(config: Dict):
+    """Picklable ChangeAwareStickyTS factory for a configuration."""
+    return partial(ChangeAwareStickyTS, **FIXED_PARAMS, **config)
+
+
+def score_configs(configs: List[Dict], n_episodes: int, seed: int = 0,
+                  workers: Optional[int] = None, morties_per_trip: int = 3) -> List[Dict]:
+    """
+    Score configurations on the same n_episodes seeded episodes.
+
+    Returns:
+        One leaderboard row (config + summary) per configuration; "params"
+        holds the configuration as JSON, so best_params() does not depend
+        on the search space it came from
+    """
+    summaries = evaluate_many(
+        [make_factory(c) for c in configs], n_episodes,
+        seed=seed, workers=workers, morties_per_trip=morties_per_trip
+    )
+    return [
+        {**c, "params": json.dumps(c, default=lambda v: v.item()), **s}
+        for c, s in zip(configs, summaries)
+    ]
+
+
+def successive_halving(configs: List[Dict], min_episodes: int = 100, eta: int = 3,
+                       max_episodes: int = 10000, seed: int = 0,
+                       workers: Optional[int] = None, morties_per_trip: int = 3,
+                       leaderboard_file: Optional[str] = LEADERBOARD_FILE,
+                       method: str = "halving") -> pd.DataFrame:
+    """
+    Successive halving over a list of configurations.
+
+    Rung r scores the surviving configurations on min_episodes * eta**r
+    episodes (common seeds within a rung) and keeps the best 1/eta by mean
+    saved fraction, until one configuration is left or max_episodes is hit.
+
+    Args:
+        configs: Configurations to race
+        min_episodes: Episode budget of the first rung
+        eta: Pruning factor
+        max_episodes: Episode budget cap
+        seed: Base seed (each rung uses its own seeds)
+        workers: Number of worker processes (default: all cores)
+        morties_per_trip: Number of Morties per trip (1-3)
+        leaderboard_file: CSV the rows of every rung are appended to (None = don't save)
+        method: Label stored in the leaderboard
+
+    Returns:
+        DataFrame with the rows of every rung
+    """
+    survivors = list(configs)
+    n_episodes = min_episodes
+    rung = 0
+    rows = []
+
+    while survivors:
+        print(f"\nRung {rung}: {len(survivors)} configurations x {n_episodes} episodes")
+        scored = score_configs(survivors, n_episodes, seed=seed + rung,
+                               workers=workers, morties_per_trip=morties_per_trip)
+        for row in scored:
+            row["rung"] = rung
+            row["method"] = method
+        rows.extend(scored)
+
+        if leaderboard_file:
+            save_leaderboard(scored, leaderboard_file)
+
+        scored.sort(key=lambda r: r["mean"], reverse=True)
+        best = scored[0]
+        print(f"  best mean saved: {best['mean']*100:.2f}% "
+              f"(95% CI {best['ci95_low']*100:.2f}% - {best['ci95_high']*100:.2f}%)")
+
+        if len(survivors) == 1 or n_episodes >= max_episodes:
+            break
+
+        keep = max(1, len(survivors) // eta)
+        survivors = [{k: r[k] for k in configs[0]} for r in scored[:keep]]
+        n_episodes = min(n_episodes * eta, max_episodes)
+        rung += 1
+
+    return pd.DataFrame(rows)
+
+
+def save_leaderboard(rows: List[Dict], filename: str = LEADERBOARD_FILE):
+    """
+    Append scored configurations to the CSV leaderboard.
+
+    Args:
+        rows: Rows returned by score_configs
+        filename: Path of the leaderboard CSV
+    """
+    df = pd.DataFrame(rows)
+    df["saved_at"] = datetime.now().isoformat(timespec="seconds")
+
+    if os.path.isfile(filename):
+        df = pd.concat([pd.read_csv(filename), df], ignore_index=True)
+    df.to_csv(filename, index=False)
+
+
+def load_leaderboard(filename: str = LEADERBOARD_FILE) -> pd.DataFrame:
+    """
+    Load the leaderboard, best configurations first.
+
+    Rows scored on more episodes come first, then by mean saved fraction.
+    """
+    df = pd.read_csv(filename)
+    return df.sort_values(["n", "mean"], ascending=False, ignore_index=True)
+
+
+def best_params(filename: str = LEADERBOARD_FILE, space: Optional[Dict] = None) -> Dict:
+    """
+    Best configuration of the leaderboard, as ChangeAwareStickyTS kwargs.
+
+    Args:
+        filename: Path of the leaderboard CSV
+        space: Search space used to decode rows saved without a "params"
+               column (default: SEARCH_SPACE)
+    """
+    best = load_leaderboard(filename).iloc[0]
+    if "params" in best and isinstance(best["params"], str):
+        return {**FIXED_PARAMS, **json.loads(best["params"])}
+
+    params = {}
+    for name, values in (space or SEARCH_SPACE).items():
+        value = best[name]
+        if isinstance(values, list):
+            # restore the python type of the search space (csv gives numpy types)
+            value = type(values[0])(value)
+        elif hasattr(value, "item"):
+            value = value.item()
+        params[name] = value
+    return {**FIXED_PARAMS, **params}
+
+
+N_RANDOM_CONFIGS = 81
+MIN_EPISODES = 100
+MAX_EPISODES = 10000
+
+
+def main():
+    print("=== CHANGE-AWARE TS HYPERPARAMETER SEARCH ===")
+    print(f"{N_RANDOM_CONFIGS} random configurations, successive halving "
+          f"from {MIN_EPISODES} to {MAX_EPISODES} episodes")
+
+    configs = random_configs(SEARCH_SPACE, N_RANDOM_CONFIGS, seed=0)
+    results = successive_halving(configs, min_episodes=MIN_EPISODES,
+                                 max_episodes=MAX_EPISODES, method="random+halving")
+
+    final = results[results["rung"] == results["rung"].max()]
+    print("\nFinal rung:")
+    print(final.sort_values("mean", ascending=False).to_string(index=False))
+    print(f"\nLeaderboard saved to {LEADERBOARD_FILE}")
+
+
+if __name__ == "__main__":
+    main()
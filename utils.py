@@ -6,6 +6,7 @@ import json
 import os
 from datetime import datetime
 from typing import Dict, List, Optional
+import numpy as np
 import pandas as pd
 
 
@@ -250,6 +251,28 @@ PLANET_NAMES = {
 }
 
 
+def survivors(result: Dict) -> int:
+    """
+    Number of Morties of a send_morties response that reached Planet Jessica.
+    
+    The API's "survived" is a bool (whether the trip's Morties survived), so
+    a True trip counts all of morties_sent. The local simulator also reports
+    the exact number as "survived_count", used when present.
+    
+    Args:
+        result: send_morties response
+        
+    Returns:
+        Number of Morties saved by the trip
+    """
+    if "survived_count" in result:
+        return int(result["survived_count"])
+    survived = result.get("survived", 0)
+    if isinstance(survived, (bool, np.bool_)):
+        return int(result.get("morties_sent", 0)) if survived else 0
+    return int(survived)
+
+
 if __name__ == "__main__":
     print("Utilities module loaded!")
     print("\nAvailable functions:")
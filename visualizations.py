@@ -1,48 +1,186 @@
 """
 Visualization functions for the Morty Express Challenge.
+
+Every plot function takes save_path (one path, or several to save the
+same figure in several formats), dpi and show. With show=False the figure
+is closed after saving, so the functions can run headless;
+create_all_visualizations(show=False) renders the whole set that way, in
+parallel worker processes using the non-interactive Agg backend.
+
+Per-trip curves are reduced before drawing (binned means, LTTB
+downsampling) to about one point per horizontal pixel, so large
+campaigns cost no more to draw than a single episode.
 """
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Union
+
+import matplotlib
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
 import numpy as np
-from typing import Optional
 
 
 # Set style for better-looking plots
 sns.set_style("whitegrid")
 plt.rcParams['figure.figsize'] = (12, 6)
 
+DEFAULT_DPI = 300
+
+
+def use_headless():
+    """Switch matplotlib to the non-interactive Agg backend."""
+    if matplotlib.get_backend().lower() != "agg":
+        plt.switch_backend("Agg")
+
+
+def _finish(fig, save_path: Optional[Union[str, Sequence[str]]], dpi: int, show: bool) -> List[str]:
+    """Save fig to every path of save_path, then show or close it."""
+    paths = [save_path] if isinstance(save_path, str) else list(save_path or [])
+    for path in paths:
+        fig.savefig(path, dpi=dpi, bbox_inches='tight')
+        print(f"Plot saved to {path}")
+
+    if show:
+        plt.show()
+    else:
+        plt.close(fig)
+    return paths
+
+
+def _max_points(fig, max_points: Optional[int]) -> int:
+    """Point budget of a series: one per horizontal pixel of the figure by default."""
+    return max_points or int(fig.get_figwidth() * fig.dpi)
+
+
+def binned_mean(x, y, n_bins: int):
+    """
+    Mean of y in n_bins equal-width bins of x.
+
+    Returns:
+        Tuple (bin centers, means) of the non-empty bins
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) == 0:
+        return x, y
+    lo, hi = x.min(), x.max()
+    edges = np.linspace(lo, hi if hi > lo else lo + 1, n_bins + 1)
+    idx = np.clip(np.searchsorted(edges, x, side="right") - 1, 0, n_bins - 1)
+
+    counts = np.bincount(idx, minlength=n_bins)
+    sums = np.bincount(idx, weights=y, minlength=n_bins)
+    filled = counts > 0
+    centers = (edges[:-1] + edges[1:]) / 2
+    return centers[filled], sums[filled] / counts[filled]
+
+
+def lttb(x, y, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, in each of n_out - 2 buckets, the
+    point forming the largest triangle with the previously kept point and
+    the mean of the next bucket, which preserves peaks and troughs.
+
+    Returns:
+        Indices of the kept points (all indices if len(x) <= n_out)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)      # n_out - 2 buckets
+    sizes = np.diff(np.append(edges, n))
+    mean_x = np.add.reduceat(x, edges) / sizes
+    mean_y = np.add.reduceat(y, edges) / sizes
+    # the bucket after the last one is the last point
+    mean_x[-1], mean_y[-1] = x[-1], y[-1]
+
+    kept = np.empty(n_out, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - mean_x[i + 1]) * (y[lo:hi] - y[a])
+                      - (x[a] - x[lo:hi]) * (mean_y[i + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def rolling_by_planet(df: pd.DataFrame, column: str = 'survived', window: int = 10) -> pd.Series:
+    """
+    Rolling mean of a column within each planet, in trip order, for every
+    planet in one pass (same values as a per-planet rolling(window,
+    min_periods=1).mean()).
+
+    Returns:
+        Series aligned with df
+    """
+    planets = df['planet'].to_numpy()
+    order = np.argsort(planets, kind='stable')
+    values = df[column].to_numpy(dtype=float)[order]
+    sorted_planets = planets[order]
+
+    csum = np.concatenate([[0.0], np.cumsum(values)])
+    pos = np.arange(len(values))
+    group_start = np.maximum.accumulate(
+        np.where(np.r_[True, sorted_planets[1:] != sorted_planets[:-1]], pos, 0)
+    )
+    window_start = np.maximum(pos + 1 - window, group_start)
+    means = (csum[pos + 1] - csum[window_start]) / (pos + 1 - window_start)
+
+    result = np.empty(len(values))
+    result[order] = means
+    return pd.Series(result, index=df.index)
 
-def plot_survival_rates(df: pd.DataFrame, save_path: Optional[str] = None):
+
+def plot_survival_rates(df: pd.DataFrame, save_path: Optional[Union[str, Sequence[str]]] = None,
+                        dpi: int = DEFAULT_DPI, show: bool = True,
+                        max_points: Optional[int] = None) -> List[str]:
     """
     Plot survival rates over time for each planet.
     
     Args:
         df: DataFrame with trip data
-        save_path: Optional path to save the figure
+        save_path: Optional path (or list of paths) to save the figure
+        dpi: Resolution of saved raster images
+        show: Display the figure (False: close it after saving)
+        max_points: Points drawn per planet (default: figure width in pixels)
+        
+    Returns:
+        Paths the figure was saved to
     """
     fig, ax = plt.subplots(figsize=(14, 6))
     
     colors = {0: '#FF6B6B', 1: '#4ECDC4', 2: '#45B7D1'}
+    max_points = _max_points(fig, max_points)
+    
+    # Cumulative survival rate of every planet in one pass
+    survived = df['survived'].astype(int).groupby(df['planet'], sort=False)
+    cumulative_survival = survived.cumsum() / (survived.cumcount() + 1) * 100
     
     for planet in df['planet'].unique():
-        planet_data = df[df['planet'] == planet].copy()
-        planet_name = planet_data['planet_name'].iloc[0]
+        in_planet = (df['planet'] == planet).to_numpy()
+        planet_name = df['planet_name'][in_planet].iloc[0]
+        steps = df['steps_taken'].to_numpy()[in_planet]
+        rate = cumulative_survival.to_numpy()[in_planet]
         
-        # Calculate cumulative survival rate
-        planet_data['cumulative_survival'] = (
-            planet_data['survived'].astype(int).cumsum() / 
-            range(1, len(planet_data) + 1)
-        ) * 100
+        keep = lttb(steps, rate, max_points)
+        decimated = len(keep) < len(steps)
         
         ax.plot(
-            planet_data['steps_taken'],
-            planet_data['cumulative_survival'],
+            steps[keep],
+            rate[keep],
             label=planet_name,
             color=colors.get(planet, '#95E1D3'),
             linewidth=2,
-            marker='o',
+            marker=None if decimated else 'o',
             markersize=3,
             alpha=0.7
         )
@@ -55,20 +193,22 @@ def plot_survival_rates(df: pd.DataFrame, save_path: Optional[str] = None):
     
     plt.tight_layout()
     
-    if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        print(f"Plot saved to {save_path}")
-    
-    plt.show()
+    return _finish(fig, save_path, dpi, show)
 
 
-def plot_survival_by_planet(df: pd.DataFrame, save_path: Optional[str] = None):
+def plot_survival_by_planet(df: pd.DataFrame, save_path: Optional[Union[str, Sequence[str]]] = None,
+                            dpi: int = DEFAULT_DPI, show: bool = True) -> List[str]:
     """
     Plot bar chart comparing overall survival rates by planet.
     
     Args:
         df: DataFrame with trip data
-        save_path: Optional path to save the figure
+        save_path: Optional path (or list of paths) to save the figure
+        dpi: Resolution of saved raster images
+        show: Display the figure (False: close it after saving)
+        
+    Returns:
+        Paths the figure was saved to
     """
     fig, ax = plt.subplots(figsize=(10, 6))
     
@@ -108,50 +248,64 @@ def plot_survival_by_planet(df: pd.DataFrame, save_path: Optional[str] = None):
     
     plt.tight_layout()
     
-    if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        print(f"Plot saved to {save_path}")
-    
-    plt.show()
+    return _finish(fig, save_path, dpi, show)
 
 
-def plot_moving_average(df: pd.DataFrame, window: int = 10, save_path: Optional[str] = None):
+def plot_moving_average(df: pd.DataFrame, window: int = 10,
+                        save_path: Optional[Union[str, Sequence[str]]] = None,
+                        dpi: int = DEFAULT_DPI, show: bool = True,
+                        max_points: Optional[int] = None) -> List[str]:
     """
     Plot moving average of survival rates for each planet.
     
+    Raw trips are drawn as points up to max_points per planet, and as
+    binned means of steps_taken beyond that.
+    
     Args:
         df: DataFrame with trip data
         window: Window size for moving average
-        save_path: Optional path to save the figure
+        save_path: Optional path (or list of paths) to save the figure
+        dpi: Resolution of saved raster images
+        show: Display the figure (False: close it after saving)
+        max_points: Points drawn per planet (default: figure width in pixels)
+        
+    Returns:
+        Paths the figure was saved to
     """
     fig, ax = plt.subplots(figsize=(14, 6))
     
     colors = {0: '#FF6B6B', 1: '#4ECDC4', 2: '#45B7D1'}
     
+    max_points = _max_points(fig, max_points)
+    
+    # Moving average of every planet in one pass
+    moving_average = rolling_by_planet(df, 'survived', window) * 100
+    
     for planet in df['planet'].unique():
-        planet_data = df[df['planet'] == planet].copy()
-        planet_name = planet_data['planet_name'].iloc[0]
-        
-        # Calculate moving average
-        planet_data['ma'] = (
-            planet_data['survived'].astype(int)
-            .rolling(window=window, min_periods=1)
-            .mean() * 100
-        )
+        in_planet = (df['planet'] == planet).to_numpy()
+        planet_name = df['planet_name'][in_planet].iloc[0]
+        steps = df['steps_taken'].to_numpy()[in_planet]
+        survived = df['survived'].to_numpy()[in_planet].astype(int) * 100
+        ma = moving_average.to_numpy()[in_planet]
         
         # Plot raw data points
+        if len(steps) > max_points:
+            steps_raw, survived_raw = binned_mean(steps, survived, max_points)
+        else:
+            steps_raw, survived_raw = steps, survived
         ax.scatter(
-            planet_data['steps_taken'],
-            planet_data['survived'].astype(int) * 100,
+            steps_raw,
+            survived_raw,
             color=colors.get(planet, '#95E1D3'),
             alpha=0.2,
             s=20
         )
         
         # Plot moving average
+        keep = lttb(steps, ma, max_points)
         ax.plot(
-            planet_data['steps_taken'],
-            planet_data['ma'],
+            steps[keep],
+            ma[keep],
             label=f"{planet_name} (MA-{window})",
             color=colors.get(planet, '#95E1D3'),
             linewidth=2.5,
@@ -167,20 +321,22 @@ def plot_moving_average(df: pd.DataFrame, window: int = 10, save_path: Optional[
     
     plt.tight_layout()
     
-    if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        print(f"Plot saved to {save_path}")
-    
-    plt.show()
+    return _finish(fig, save_path, dpi, show)
 
 
-def plot_risk_evolution(df: pd.DataFrame, save_path: Optional[str] = None):
+def plot_risk_evolution(df: pd.DataFrame, save_path: Optional[Union[str, Sequence[str]]] = None,
+                        dpi: int = DEFAULT_DPI, show: bool = True) -> List[str]:
     """
     Plot how risk evolves over time for each planet (early vs late trips).
     
     Args:
         df: DataFrame with trip data
-        save_path: Optional path to save the figure
+        save_path: Optional path (or list of paths) to save the figure
+        dpi: Resolution of saved raster images
+        show: Display the figure (False: close it after saving)
+        
+    Returns:
+        Paths the figure was saved to
     """
     fig, axes = plt.subplots(1, 3, figsize=(15, 5))
     
@@ -228,20 +384,22 @@ def plot_risk_evolution(df: pd.DataFrame, save_path: Optional[str] = None):
     fig.suptitle('Risk Evolution Over Time (Early, Middle, Late Trips)', fontsize=14, fontweight='bold')
     plt.tight_layout()
     
-    if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        print(f"Plot saved to {save_path}")
-    
-    plt.show()
+    return _finish(fig, save_path, dpi, show)
 
 
-def plot_episode_summary(df: pd.DataFrame, save_path: Optional[str] = None):
+def plot_episode_summary(df: pd.DataFrame, save_path: Optional[Union[str, Sequence[str]]] = None,
+                         dpi: int = DEFAULT_DPI, show: bool = True) -> List[str]:
     """
     Create a comprehensive dashboard with multiple plots.
     
     Args:
         df: DataFrame with trip data
-        save_path: Optional path to save the figure
+        save_path: Optional path (or list of paths) to save the figure
+        dpi: Resolution of saved raster images
+        show: Display the figure (False: close it after saving)
+        
+    Returns:
+        Paths the figure was saved to
     """
     fig = plt.figure(figsize=(16, 10))
     gs = fig.add_gridspec(3, 2, hspace=0.3, wspace=0.3)
@@ -250,12 +408,17 @@ def plot_episode_summary(df: pd.DataFrame, save_path: Optional[str] = None):
     
     # 1. Survival rates over time
     ax1 = fig.add_subplot(gs[0, :])
+    max_points = _max_points(fig, None)
+    survived = df['survived'].astype(int).groupby(df['planet'], sort=False)
+    cumulative_survival = (survived.cumsum() / (survived.cumcount() + 1) * 100).to_numpy()
     for planet in df['planet'].unique():
-        planet_data = df[df['planet'] == planet]
-        planet_name = planet_data['planet_name'].iloc[0]
+        in_planet = (df['planet'] == planet).to_numpy()
+        planet_name = df['planet_name'][in_planet].iloc[0]
+        steps = df['steps_taken'].to_numpy()[in_planet]
+        keep = lttb(steps, cumulative_survival[in_planet], max_points)
         ax1.plot(
-            planet_data['steps_taken'],
-            planet_data['survived'].astype(int).cumsum() / range(1, len(planet_data) + 1) * 100,
+            steps[keep],
+            cumulative_survival[in_planet][keep],
             label=planet_name,
             color=colors[planet],
             linewidth=2
@@ -311,35 +474,72 @@ def plot_episode_summary(df: pd.DataFrame, save_path: Optional[str] = None):
     
     fig.suptitle('Morty Express Challenge - Episode Summary', fontsize=16, fontweight='bold')
     
-    if save_path:
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        print(f"Plot saved to {save_path}")
-    
-    plt.show()
+    return _finish(fig, save_path, dpi, show)
+
+
+# file stem -> (plot function, extra arguments) rendered by create_all_visualizations
+ALL_PLOTS = {
+    "survival_rates": (plot_survival_rates, {}),
+    "survival_by_planet": (plot_survival_by_planet, {}),
+    "moving_average": (plot_moving_average, {"window": 10}),
+    "risk_evolution": (plot_risk_evolution, {}),
+    "episode_summary": (plot_episode_summary, {}),
+}
+
 
+def _render(name: str, df: pd.DataFrame, paths: List[str], dpi: int) -> List[str]:
+    use_headless()
+    function, kwargs = ALL_PLOTS[name]
+    return function(df, save_path=paths, dpi=dpi, show=False, **kwargs)
 
-def create_all_visualizations(df: pd.DataFrame, output_dir: str = "plots"):
+
+def create_all_visualizations(df: pd.DataFrame, output_dir: str = "plots",
+                              formats: Sequence[str] = ("png",), dpi: int = DEFAULT_DPI,
+                              show: bool = True, workers: Optional[int] = None) -> List[str]:
     """
     Create and save all visualizations.
     
     Args:
         df: DataFrame with trip data
         output_dir: Directory to save plots
+        formats: File formats to save each plot in (e.g. ("png", "svg"))
+        dpi: Resolution of raster formats (e.g. 150 for quicker renders)
+        show: Display each figure, in this process. show=False renders
+              headless, in worker processes
+        workers: Number of worker processes when show=False (default: one
+                 per plot, at most the number of cores; 1 renders in this
+                 process)
+        
+    Returns:
+        Paths of the saved files
     """
-    import os
-    
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
     
     print("Creating visualizations...")
     
-    plot_survival_rates(df, save_path=f"{output_dir}/survival_rates.png")
-    plot_survival_by_planet(df, save_path=f"{output_dir}/survival_by_planet.png")
-    plot_moving_average(df, window=10, save_path=f"{output_dir}/moving_average.png")
-    plot_risk_evolution(df, save_path=f"{output_dir}/risk_evolution.png")
-    plot_episode_summary(df, save_path=f"{output_dir}/episode_summary.png")
+    jobs = [
+        (name, [os.path.join(output_dir, f"{name}.{fmt}") for fmt in formats])
+        for name in ALL_PLOTS
+    ]
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    
+    paths = []
+    if show:
+        for name, job_paths in jobs:
+            function, kwargs = ALL_PLOTS[name]
+            paths += function(df, save_path=job_paths, dpi=dpi, show=True, **kwargs)
+    elif workers == 1:
+        for name, job_paths in jobs:
+            paths += _render(name, df, job_paths, dpi)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=use_headless) as executor:
+            futures = [executor.submit(_render, name, df, job_paths, dpi) for name, job_paths in jobs]
+            for future in futures:
+                paths += future.result()
     
     print(f"\nAll visualizations saved to {output_dir}/")
+    return paths
 
 
 if __name__ == "__main__":
@@ -350,4 +550,4 @@ if __name__ == "__main__":
     print("  - plot_moving_average(df, window=10)")
     print("  - plot_risk_evolution(df)")
     print("  - plot_episode_summary(df)")
-    print("  - create_all_visualizations(df, output_dir='plots')")
+    print("  - create_all_visualizations(df, output_dir='plots', formats=('png',), show=True)")